@@ -30,11 +30,16 @@ class Settings:
     langfuse_secret_key: Optional[str] = None
     langfuse_host: str = "https://cloud.langfuse.com"
     langfuse_enabled: bool = True
+    langfuse_sample_rate: float = 1.0  # fraction of sessions whose routine activity is traced
 
     # OpenTelemetry Settings for Pipecat
     otel_service_name: str = "jmi-broadband-voice-agent"
     otel_exporter_otlp_endpoint: Optional[str] = None
     otel_exporter_otlp_headers: Optional[str] = None
+    # Span batching sized for voice event density (several events/sec per session)
+    otel_max_queue_size: int = 4096
+    otel_schedule_delay_millis: int = 500
+    otel_max_export_batch_size: int = 512
     
     # WebSocket Settings
     websocket_timeout: int = 30
@@ -57,7 +62,7 @@ class Settings:
     max_gemini_retries: int = 3
     
     # Logging Settings
-    log_level: str = "DEBUG"
+    log_level: str = "INFO"  # set LOG_LEVEL=DEBUG for per-frame voice logs
     log_format: str = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
     
     # Valid pages configuration
@@ -178,6 +183,10 @@ class SettingsManager:
             settings.conversation_memory_size = int(os.getenv("MEMORY_SIZE", str(settings.conversation_memory_size)))
             settings.session_timeout = int(os.getenv("SESSION_TIMEOUT", str(settings.session_timeout)))
             settings.vad_stop_seconds = float(os.getenv("VAD_STOP_SECONDS", str(settings.vad_stop_seconds)))
+            settings.langfuse_sample_rate = float(os.getenv("LANGFUSE_SAMPLE_RATE", str(settings.langfuse_sample_rate)))
+            settings.otel_max_queue_size = int(os.getenv("OTEL_MAX_QUEUE_SIZE", str(settings.otel_max_queue_size)))
+            settings.otel_schedule_delay_millis = int(os.getenv("OTEL_SCHEDULE_DELAY_MILLIS", str(settings.otel_schedule_delay_millis)))
+            settings.otel_max_export_batch_size = int(os.getenv("OTEL_MAX_EXPORT_BATCH_SIZE", str(settings.otel_max_export_batch_size)))
         except ValueError as e:
             logger.warning(f"⚠️ Error parsing numeric setting: {e}, using defaults")
         
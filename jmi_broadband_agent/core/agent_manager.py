@@ -13,6 +13,7 @@ from pipecat.processors.frameworks.rtvi import RTVIProcessor
 # Import configuration and utilities
 from jmi_broadband_agent.config.settings import get_settings, MSSQL_SEARCH_AI_SYSTEM_INSTRUCTION
 from jmi_broadband_agent.utils.validators import validate_page_name
+from jmi_broadband_agent.utils.time_utils import fast_iso_now
 
 # Import page-specific tools
 from jmi_broadband_agent.tools import (
@@ -149,8 +150,7 @@ class AgentManager:
     
     def _get_timestamp(self) -> str:
         """Get current timestamp."""
-        from datetime import datetime
-        return datetime.now().isoformat()
+        return fast_iso_now()
     
     def get_system_instruction_with_page_context(self, user_id: str = None) -> str:
         """Get system instruction with current page context."""
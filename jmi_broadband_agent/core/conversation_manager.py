@@ -6,12 +6,51 @@ Ensures each user has one conversation session with proper trace consolidation.
 
 import uuid
 import time
-from typing import Dict, Any, Optional, List
+import asyncio
+from collections import deque
+from typing import Deque, Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from dataclasses import dataclass, field
 from loguru import logger
 
+from ..config.settings import get_settings
 from ..utils.langfuse_tracing import get_langfuse_tracer
+from ..utils.time_utils import fast_iso_now
+
+# Activities traced even for sessions outside the sample, so failures are never lost
+ALWAYS_TRACED_ACTIVITIES = frozenset({
+    "conversation_error",
+    "service_unavailable",
+    "text_error",
+    "tool_function_call_error",
+    "llm_function_call_error",
+})
+
+# Max routine activities held per user while waiting to see if the session errors
+ACTIVITY_BUFFER_SIZE = 256
+
+# Background trace export: queue bound and max activities emitted per worker wake-up
+TRACE_QUEUE_SIZE = 10_000
+TRACE_BATCH_SIZE = 32
+
+
+class ActivityBatch:
+    """Collects one turn's activities and hands them to the trace in a single call."""
+
+    def __init__(self, manager: "ConversationManager", user_id: str):
+        self._manager = manager
+        self._user_id = user_id
+        self._items: List[Tuple[str, Dict[str, Any], str]] = []
+
+    def add(self, activity_type: str, data: Dict[str, Any]):
+        """Record an activity, timestamped now, for the next flush."""
+        self._items.append((activity_type, data, fast_iso_now()))
+
+    def flush(self):
+        """Log everything collected so far to the user's trace."""
+        items, self._items = self._items, []
+        if items:
+            self._manager.log_activity_batch(self._user_id, items)
 
 
 @dataclass
@@ -28,6 +67,7 @@ class ConversationSession:
     metadata: Dict[str, Any] = field(default_factory=dict)
     message_count: int = 0
     is_active: bool = True
+    sampled: bool = True  # head-based sampling decision for routine activity
 
     def update_activity(self):
         """Update the last activity timestamp."""
@@ -49,7 +89,8 @@ class ConversationSession:
             "current_page": self.current_page,
             "metadata": self.metadata,
             "message_count": self.message_count,
-            "is_active": self.is_active
+            "is_active": self.is_active,
+            "sampled": self.sampled
         }
 
 
@@ -70,6 +111,10 @@ class ConversationManager:
             return
         self._initialized = True
         self.langfuse_tracer = get_langfuse_tracer()
+        self._activity_buffers: Dict[str, Deque[Tuple[str, Dict[str, Any], str]]] = {}
+        self._trace_queue: Optional[asyncio.Queue] = None
+        self._trace_worker_task: Optional[asyncio.Task] = None
+        self.dropped_activities = 0
         logger.info("✅ ConversationManager initialized")
 
     def get_or_create_session(self, user_id: str, conversation_type: str = "unified", current_page: str = "broadband") -> ConversationSession:
@@ -101,7 +146,8 @@ class ConversationManager:
             last_activity=now,
             conversation_type=conversation_type,
             current_page=current_page,
-            metadata={"created_by": conversation_type}
+            metadata={"created_by": conversation_type},
+            sampled=self._is_sampled(session_id)
         )
 
         # Create Langfuse trace for this session
@@ -117,6 +163,19 @@ class ConversationManager:
         logger.info(f"🆕 Created new conversation session {session_id} for user {user_id} (type: {conversation_type})")
         return session
 
+    def _is_sampled(self, session_id: str) -> bool:
+        """Decide once per session whether routine activity is traced (LANGFUSE_SAMPLE_RATE)."""
+        sample_rate = get_settings().langfuse_sample_rate
+        if sample_rate >= 1.0:
+            return True
+        # uuid4 hex digits are uniformly random, so the leading 16 bits are a fair coin
+        return int(session_id[:4], 16) / 65536.0 < sample_rate
+
+    def is_session_sampled(self, user_id: str) -> bool:
+        """Check whether the user's active session is in the trace sample."""
+        session = self.get_session(user_id)
+        return session is not None and session.sampled
+
     def _create_conversation_trace(self, session: ConversationSession) -> Optional[Any]:
         """Create a unified conversation trace for the session."""
         if not self.langfuse_tracer.is_enabled():
@@ -181,6 +240,7 @@ class ConversationManager:
 
     def end_session(self, user_id: str):
         """End the session for a user."""
+        self.discard_activity_buffer(user_id)
         session = self.get_session(user_id)
         if session:
             session.is_active = False
@@ -234,15 +294,68 @@ class ConversationManager:
         if to_remove:
             logger.info(f"🧹 Cleaned up {len(to_remove)} inactive sessions")
 
-    def log_activity_to_trace(self, user_id: str, activity_type: str, data: Dict[str, Any]):
-        """Log activity to the user's conversation trace."""
+    def log_activity_to_trace(self, user_id: str, activity_type: str, data: Dict[str, Any], force: bool = False):
+        """
+        Log activity to the user's conversation trace.
+
+        When the trace worker is running the span is emitted in the background, so
+        callers on the response path never wait on Langfuse; otherwise it is emitted inline.
+        force=True skips the session's head-sampling decision.
+        """
         session = self.get_session(user_id)
         if not session:
             return
 
+        if not force and not session.sampled and activity_type not in ALWAYS_TRACED_ACTIVITIES:
+            return
+
         if not self.langfuse_tracer.is_enabled():
             return
 
+        if self._trace_queue is None:
+            self._emit_activity_span(session, user_id, activity_type, data, fast_iso_now())
+            return
+
+        try:
+            self._trace_queue.put_nowait((session, user_id, activity_type, data, fast_iso_now()))
+        except asyncio.QueueFull:
+            self.dropped_activities += 1
+            if self.dropped_activities % 1000 == 1:
+                logger.warning(f"⚠️ Trace queue full, dropped {self.dropped_activities} activities so far")
+
+    def begin_activity_batch(self, user_id: str) -> ActivityBatch:
+        """Start collecting activities for one turn; call flush() on the batch when the turn ends."""
+        return ActivityBatch(self, user_id)
+
+    def log_activity_batch(self, user_id: str, items: List[Tuple[str, Dict[str, Any], str]]):
+        """
+        Log several (activity_type, data, timestamp) activities to the user's trace.
+
+        Same filtering and delivery as log_activity_to_trace, but the session lookup
+        and tracer checks happen once for the whole batch.
+        """
+        session = self.get_session(user_id)
+        if not session or not self.langfuse_tracer.is_enabled():
+            return
+
+        for activity_type, data, timestamp in items:
+            if not session.sampled and activity_type not in ALWAYS_TRACED_ACTIVITIES:
+                continue
+
+            if self._trace_queue is None:
+                self._emit_activity_span(session, user_id, activity_type, data, timestamp)
+                continue
+
+            try:
+                self._trace_queue.put_nowait((session, user_id, activity_type, data, timestamp))
+            except asyncio.QueueFull:
+                self.dropped_activities += 1
+                if self.dropped_activities % 1000 == 1:
+                    logger.warning(f"⚠️ Trace queue full, dropped {self.dropped_activities} activities so far")
+
+    def _emit_activity_span(self, session: ConversationSession, user_id: str, activity_type: str,
+                            data: Dict[str, Any], timestamp: str):
+        """Create and end a Langfuse span for one activity."""
         try:
             # Create a child span for this activity using TraceContext
             from langfuse.types import TraceContext
@@ -261,7 +374,7 @@ class ConversationManager:
                     "activity_type": activity_type,
                     "user_id": user_id,
                     "session_id": session.session_id,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": timestamp
                 }
             )
 
@@ -272,6 +385,76 @@ class ConversationManager:
         except Exception as e:
             logger.warning(f"⚠️ Failed to log activity to trace: {e}")
 
+    def start_trace_worker(self):
+        """Start the background trace export worker. Must be called from a running event loop."""
+        if self._trace_worker_task is not None and not self._trace_worker_task.done():
+            return
+        self._trace_queue = asyncio.Queue(maxsize=TRACE_QUEUE_SIZE)
+        self._trace_worker_task = asyncio.create_task(self._trace_worker())
+        logger.info("✅ Trace export worker started")
+
+    async def stop_trace_worker(self):
+        """Stop the trace worker and emit anything still queued inline."""
+        if self._trace_worker_task is None:
+            return
+        self._trace_worker_task.cancel()
+        try:
+            await self._trace_worker_task
+        except asyncio.CancelledError:
+            pass
+
+        queue, self._trace_queue, self._trace_worker_task = self._trace_queue, None, None
+        while not queue.empty():
+            self._emit_activity_span(*queue.get_nowait())
+
+    async def _trace_worker(self):
+        """Drain queued activities in small batches and emit their spans."""
+        queue = self._trace_queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < TRACE_BATCH_SIZE:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            for item in batch:
+                self._emit_activity_span(*item)
+            # Yield so a large backlog doesn't starve request handlers
+            await asyncio.sleep(0)
+
+    def buffer_activity(self, user_id: str, activity_type: str, data: Dict[str, Any]):
+        """
+        Record activity locally instead of exporting it.
+
+        Buffered activity only reaches the trace if flush_activity_buffer is called
+        (typically from an error path); on a clean run it is discarded.
+        """
+        buffer = self._activity_buffers.get(user_id)
+        if buffer is None:
+            buffer = self._activity_buffers[user_id] = deque(maxlen=ACTIVITY_BUFFER_SIZE)
+        buffer.append((activity_type, data, fast_iso_now()))
+
+    def flush_activity_buffer(self, user_id: str) -> int:
+        """
+        Export all buffered activity for a user to their trace. Returns the number flushed.
+
+        Flushes happen on errors, so they bypass head sampling: an unsampled session
+        still gets the context leading up to the failure.
+        """
+        buffer = self._activity_buffers.pop(user_id, None)
+        if not buffer:
+            return 0
+
+        for activity_type, data, recorded_at in buffer:
+            self.log_activity_to_trace(user_id, activity_type, {**data, "recorded_at": recorded_at}, force=True)
+        logger.debug(f"📊 Flushed {len(buffer)} buffered activities for user {user_id}")
+        return len(buffer)
+
+    def discard_activity_buffer(self, user_id: str):
+        """Drop buffered activity for a user without exporting it."""
+        self._activity_buffers.pop(user_id, None)
+
     def get_session_stats(self) -> Dict[str, Any]:
         """Get statistics about active sessions."""
         active_sessions = self.get_active_sessions()
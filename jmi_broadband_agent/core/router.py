@@ -5,9 +5,9 @@ Updated to work with the new modular tool structure and improved configuration.
 """
 
 import os
+import re
 import sys
 import time
-import uuid
 import random
 
 # Add the project root to Python path FIRST, before any other imports
@@ -18,11 +18,11 @@ if project_root not in sys.path:
 import asyncio
 import json
 from typing import Any, Dict, Optional
-from datetime import datetime
 
+import orjson
 import uvicorn
 from dotenv import load_dotenv
-from fastapi import WebSocket, Request, APIRouter, HTTPException
+from fastapi import WebSocket, WebSocketDisconnect, Request, APIRouter, HTTPException
 from loguru import logger
 import websockets
 
@@ -51,8 +51,6 @@ except ImportError:
             self.trace_id = None
     trace = MockTracer()
 
-from pipecat.audio.vad.silero import SileroVADAnalyzer
-from pipecat.audio.vad.vad_analyzer import VADParams
 from pipecat.pipeline.pipeline import Pipeline
 from pipecat.pipeline.runner import PipelineRunner
 from pipecat.pipeline.task import PipelineParams, PipelineTask
@@ -80,10 +78,11 @@ from jmi_broadband_agent.core.websocket_registry import (
     get_all_users, send_to_user_tool_websocket
 )
 from jmi_broadband_agent.core.text_agent import create_text_agent
-from jmi_broadband_agent.core.voice_agent import create_voice_agent
+from jmi_broadband_agent.core.voice_agent import create_voice_agent, get_vad_analyzer
 from jmi_broadband_agent.core.conversation_manager import get_conversation_manager
-from jmi_broadband_agent.utils.validators import validate_page_name, validate_api_key
-from jmi_broadband_agent.utils.langfuse_tracing import get_langfuse_tracer, log_api_call, setup_tracing
+from jmi_broadband_agent.utils.validators import normalize_page_name, validate_page_name, validate_api_key
+from jmi_broadband_agent.utils.time_utils import fast_iso_now
+from jmi_broadband_agent.utils.langfuse_tracing import get_langfuse_tracer, log_api_call, ensure_tracing
 from jmi_broadband_agent.functions.auth_store import auth_store_router
 
 load_dotenv(override=True)
@@ -97,7 +96,27 @@ if project_root not in sys.path:
 session_agents = {}
 session_websockets = {}
 session_user_mapping = {}
-user_text_agents = {}
+user_text_agents: Dict[str, Dict[str, Any]] = {}  # user_id -> current_page -> text agent
+user_text_agents_last_used: Dict[str, float] = {}  # user_id -> time.monotonic() of last use
+
+# Process-wide singletons, bound once instead of looked up in every handler
+settings = get_settings()
+conversation_manager = get_conversation_manager()
+
+# Upper bound on how long a backpressured socket may delay text-mode failover
+FALLBACK_SEND_TIMEOUT = 1.0
+
+# Text agents unused for this long are evicted by the periodic cleanup task
+TEXT_AGENT_IDLE_SECONDS = 60 * 60
+
+# Max replies waiting on a websocket writer task before the receive loop waits for it
+WRITER_QUEUE_SIZE = 64
+
+# Error messages that indicate a Gemini Live service failure (vs. a local bug)
+_GEMINI_ERR_RE = re.compile(
+    r"1011|internal error|service is currently unavailable|deadline expired|gemini",
+    re.IGNORECASE
+)
 
 # Configure logger
 try:
@@ -105,7 +124,7 @@ try:
 except ValueError:
     # Handle case where default handler doesn't exist
     pass
-logger.add(sys.stderr, level="DEBUG")
+logger.add(sys.stderr, level=settings.log_level)
 
 
 async def retry_with_exponential_backoff(
@@ -136,14 +155,22 @@ async def retry_with_exponential_backoff(
     return None
 
 
+def _is_gemini_error(e: Exception) -> bool:
+    """Check whether an exception looks like a Gemini service failure."""
+    return _GEMINI_ERR_RE.search(str(e)) is not None
+
+
 async def fallback_to_text_mode(websocket: WebSocket, session_id: str, user_id: str, current_page: str = "broadband"):
     """Fallback to text-only conversation when voice service fails."""
     logger.info(f"📝 Falling back to text mode for user {user_id} on page {current_page}")
 
     try:
-        # Send message to user about fallback
+        # Send message to user about fallback; don't let a backpressured socket stall failover
         fallback_message = "I'm switching to text-only mode due to voice service issues. Please type your messages and I'll respond."
-        await websocket.send_text(fallback_message)
+        try:
+            await asyncio.wait_for(websocket.send_text(fallback_message), timeout=FALLBACK_SEND_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("⚠️ Fallback notice send timed out, starting text mode anyway")
 
         # Run text conversation bot as fallback
         await run_text_conversation_bot(websocket, session_id, user_id, current_page)
@@ -152,13 +179,12 @@ async def fallback_to_text_mode(websocket: WebSocket, session_id: str, user_id:
         logger.error(f"❌ Text fallback failed: {e}")
         try:
             await websocket.send_text("I'm experiencing technical difficulties. Please try reconnecting.")
-        except:
-            pass
+        except (WebSocketDisconnect, websockets.exceptions.ConnectionClosedError, RuntimeError):
+            pass  # WebSocket already closed
 
 
 async def create_gemini_live_llm(enable_function_calling: bool = True, current_page: str = "broadband"):
     """Create Gemini Live LLM service with function calling and page context."""
-    settings = get_settings()
 
     if not validate_api_key(settings.google_api_key)[0]:
         raise ValueError("Invalid or missing GOOGLE_API_KEY.")
@@ -260,21 +286,12 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
         current_page = normalized_page
     else:
         logger.warning(f"⚠️ Invalid page name, using: {current_page}")
-        current_page = current_page.lower().strip().replace(" ", "-").replace("_", "-")
-
-    settings = get_settings()
+        current_page = normalize_page_name(current_page)
 
-    # Set OTLP environment variables before Pipecat initializes
-    if settings.langfuse_enabled:
-        if settings.otel_exporter_otlp_endpoint:
-            os.environ["OTEL_EXPORTER_OTLP_ENDPOINT"] = settings.otel_exporter_otlp_endpoint
-            logger.info(f"✅ Set OTLP environment variables for Pipecat: {settings.otel_exporter_otlp_endpoint}")
-        if settings.otel_exporter_otlp_headers:
-            os.environ["OTEL_EXPORTER_OTLP_HEADERS"] = settings.otel_exporter_otlp_headers
 
-    # Initialize OpenTelemetry tracing for Pipecat following official docs
+    # Initialize OpenTelemetry tracing (and OTLP env vars) once per process
     try:
-        setup_tracing(
+        ensure_tracing(
             service_name=settings.otel_service_name,
             settings=settings
         )
@@ -282,7 +299,6 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
         logger.warning(f"⚠️ Failed to initialize OpenTelemetry tracing: {e}")
 
     # Get unified conversation session and trace
-    conversation_manager = get_conversation_manager()
     conversation_session = conversation_manager.get_or_create_session(
         user_id=user_id,
         conversation_type="voice",
@@ -306,7 +322,7 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
             audio_in_enabled=True,
             audio_out_enabled=True,
             add_wav_header=False,
-            vad_analyzer=SileroVADAnalyzer(params=VADParams(stop_secs=settings.vad_stop_seconds)),
+            vad_analyzer=get_vad_analyzer(settings.vad_stop_seconds),
             serializer=ProtobufFrameSerializer(),
         ),
     )
@@ -323,7 +339,7 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
     context_aggregator = llm_service.create_context_aggregator(context)
 
     # Log system prompt to unified trace
-    conversation_manager.log_activity_to_trace(
+    conversation_manager.buffer_activity(
         user_id=user_id,
         activity_type="system_initialization",
         data={
@@ -337,11 +353,16 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
     @llm_service.event_handler("on_llm_response")
     async def on_llm_response(response):
         """Capture LLM responses for transcript logging."""
+        if not conversation_trace:
+            return
         llm_start_time = time.time()  # Track LLM response processing duration
         
         try:
-            logger.info(f"🤖 LLM Response received: {type(response)}")
-            logger.info(f"📝 Response attributes: {[attr for attr in dir(response) if not attr.startswith('_')]}")
+            logger.debug("🤖 LLM Response received: {}", type(response))
+            logger.opt(lazy=True).debug(
+                "📝 Response attributes: {}",
+                lambda: [attr for attr in dir(response) if not attr.startswith('_')]
+            )
 
             # Check if response has transcript data (for multimodal Gemini)
             transcript_text = None
@@ -349,14 +370,14 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
 
             # Check for transcript in response metadata or content
             if hasattr(response, 'metadata') and response.metadata:
-                logger.info(f"📝 Response metadata: {response.metadata}")
+                logger.debug("📝 Response metadata: {}", response.metadata)
                 if 'transcript' in response.metadata:
                     transcript_text = response.metadata['transcript']
 
             # Check for transcript in response content
             if hasattr(response, 'content'):
                 response_text = response.content[:200] + "..." if len(response.content) > 200 else response.content
-                logger.info(f"📝 LLM Response content: {response_text}")
+                logger.debug("📝 LLM Response content: {}", response_text)
 
                 # For multimodal responses, transcript might be in content
                 if not transcript_text and 'transcript' in response_text.lower():
@@ -368,43 +389,42 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
             llm_duration = llm_end_time - llm_start_time
 
             # Log both transcript and response to Langfuse with duration
-            if conversation_trace:
-                try:
-                    update_data = {"user_id": user_id}
-                    update_metadata = {"response_source": "llm", "user_id": user_id}
-
-                    if transcript_text:
-                        update_data["transcript"] = transcript_text
-                        update_metadata["transcript_source"] = "llm_response_metadata"
-
-                    if response_text:
-                        update_data["ai_response"] = response_text
-                        update_metadata["response_length"] = len(response_text)
-
-                    # Add LLM duration timing
-                    update_metadata.update({
-                        "llm_duration_seconds": llm_duration,
-                        "llm_processing_time": llm_end_time,
-                        "llm_start_time": llm_start_time
-                    })
-
-                    conversation_manager.log_activity_to_trace(
-                        user_id=user_id,
-                        activity_type="llm_response",
-                        data={
-                            **update_data,
-                            **update_metadata,
-                            "session_id": conversation_session_id
-                        }
-                    )
+            try:
+                update_data = {"user_id": user_id}
+                update_metadata = {"response_source": "llm", "user_id": user_id}
 
-                    if transcript_text:
-                        logger.info(f"🔍 Logged transcript to Langfuse: '{transcript_text[:50]}...' (duration: {llm_duration:.3f}s)")
-                    if response_text:
-                        logger.info(f"🔍 Logged AI response to Langfuse: {response_text[:50]}... (duration: {llm_duration:.3f}s)")
+                if transcript_text:
+                    update_data["transcript"] = transcript_text
+                    update_metadata["transcript_source"] = "llm_response_metadata"
 
-                except Exception as e:
-                    logger.warning(f"⚠️ Failed to log LLM response to Langfuse: {e}")
+                if response_text:
+                    update_data["ai_response"] = response_text
+                    update_metadata["response_length"] = len(response_text)
+
+                # Add LLM duration timing
+                update_metadata.update({
+                    "llm_duration_seconds": llm_duration,
+                    "llm_processing_time": llm_end_time,
+                    "llm_start_time": llm_start_time
+                })
+
+                conversation_manager.buffer_activity(
+                    user_id=user_id,
+                    activity_type="llm_response",
+                    data={
+                        **update_data,
+                        **update_metadata,
+                        "session_id": conversation_session_id
+                    }
+                )
+
+                if transcript_text:
+                    logger.info(f"🔍 Logged transcript to Langfuse: '{transcript_text[:50]}...' (duration: {llm_duration:.3f}s)")
+                if response_text:
+                    logger.info(f"🔍 Logged AI response to Langfuse: {response_text[:50]}... (duration: {llm_duration:.3f}s)")
+
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to log LLM response to Langfuse: {e}")
 
         except Exception as e:
             logger.warning(f"⚠️ Failed to handle LLM response: {e}")
@@ -418,17 +438,17 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
         llm_tool_call_start_time = time.time()
 
         try:
-            logger.info(f"🔧 Function call received: {type(function_call)}")
+            logger.debug("🔧 Function call received: {}", type(function_call))
             if hasattr(function_call, 'name'):
-                logger.info(f"📝 Function name: {function_call.name}")
+                logger.debug("📝 Function name: {}", function_call.name)
                 if hasattr(function_call, 'arguments'):
-                    logger.info(f"📝 Function arguments: {function_call.arguments}")
+                    logger.debug("📝 Function arguments: {}", function_call.arguments)
 
                 # Log function call activity to unified trace with duration tracking
                 llm_tool_call_end_time = time.time()
                 llm_tool_call_duration = llm_tool_call_end_time - llm_tool_call_start_time
 
-                conversation_manager.log_activity_to_trace(
+                conversation_manager.buffer_activity(
                     user_id=user_id,
                     activity_type="llm_function_call",
                     data={
@@ -446,7 +466,8 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
             llm_tool_call_duration = llm_tool_call_end_time - llm_tool_call_start_time
             logger.warning(f"⚠️ Failed to handle function call: {e}")
 
-            # Log error with duration info
+            # Export the buffered context leading up to the error, then the error itself
+            conversation_manager.flush_activity_buffer(user_id)
             conversation_manager.log_activity_to_trace(
                 user_id=user_id,
                 activity_type="llm_function_call_error",
@@ -507,54 +528,57 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
     @transcript.event_handler("on_transcript_update")
     async def on_transcript_update(processor, frame):
         """Handle STT transcript data to update Langfuse trace with user input."""
+        if not agent_manager.conversation_trace:
+            return
         stt_start_time = time.time()  # Track STT processing duration
         
         try:
-            logger.info(f"🎤 Received transcript update from processor: {type(processor).__name__}")
-            logger.info(f"📝 Frame type: {type(frame).__name__}")
-            logger.info(f"📝 Frame attributes: {dir(frame)}")
-
-            if hasattr(agent_manager, 'conversation_trace') and agent_manager.conversation_trace:
-                # Extract transcript messages from the frame
-                if hasattr(frame, 'messages') and frame.messages:
-                    logger.info(f"📝 Found {len(frame.messages)} messages in frame")
-                    for i, message in enumerate(frame.messages):
-                        logger.info(f"📝 Message {i}: role={message.role}, content='{message.content[:100]}...', timestamp={getattr(message, 'timestamp', None)}")
-
-                        if message.role == "user" and message.content.strip():
-                            transcript_text = message.content.strip()
-                            stt_end_time = time.time()
-                            stt_duration = stt_end_time - stt_start_time
-
-                            # Log STT input to unified trace with duration
-                            try:
-                                conversation_manager.log_activity_to_trace(
-                                    user_id=user_id,
-                                    activity_type="input",
-                                    data={
-                                        "transcript": transcript_text,
-                                        "source": "stt",
-                                        "processor": type(processor).__name__,
-                                        "message_role": message.role,
-                                        "content_length": len(transcript_text),
-                                        "timestamp": getattr(message, 'timestamp', None),
-                                        "session_id": conversation_session_id,
-                                        "is_final": True,
-                                        "language": "en-US",  # Default, could be extracted from frame metadata
-                                        "stt_duration_seconds": stt_duration,
-                                        "stt_processing_time": stt_end_time,
-                                        "stt_start_time": stt_start_time
-                                    }
-                                )
-                                logger.info(f"🔍 Updated unified trace with STT input: '{transcript_text[:50]}...' (duration: {stt_duration:.3f}s)")
-                                logger.info(f"✅ STT input logged to unified trace successfully")
-                            except Exception as e:
-                                logger.warning(f"⚠️ Failed to update STT input in unified trace: {e}")
-                else:
-                    logger.warning(f"⚠️ Frame has no messages attribute or messages is empty")
-                    logger.info(f"📝 Frame content: {frame}")
+            logger.debug("🎤 Received transcript update from processor: {}", type(processor).__name__)
+            logger.debug("📝 Frame type: {}", type(frame).__name__)
+            logger.opt(lazy=True).debug("📝 Frame attributes: {}", lambda: dir(frame))
+
+            # Extract transcript messages from the frame
+            if hasattr(frame, 'messages') and frame.messages:
+                logger.debug("📝 Found {} messages in frame", len(frame.messages))
+                for i, message in enumerate(frame.messages):
+                    logger.opt(lazy=True).debug(
+                        "📝 Message {}: role={}, content='{}...', timestamp={}",
+                        lambda: i, lambda: message.role, lambda: message.content[:100],
+                        lambda: getattr(message, 'timestamp', None)
+                    )
+
+                    if message.role == "user" and message.content.strip():
+                        transcript_text = message.content.strip()
+                        stt_end_time = time.time()
+                        stt_duration = stt_end_time - stt_start_time
+
+                        # Log STT input to unified trace with duration
+                        try:
+                            conversation_manager.buffer_activity(
+                                user_id=user_id,
+                                activity_type="input",
+                                data={
+                                    "transcript": transcript_text,
+                                    "source": "stt",
+                                    "processor": type(processor).__name__,
+                                    "message_role": message.role,
+                                    "content_length": len(transcript_text),
+                                    "timestamp": getattr(message, 'timestamp', None),
+                                    "session_id": conversation_session_id,
+                                    "is_final": True,
+                                    "language": "en-US",  # Default, could be extracted from frame metadata
+                                    "stt_duration_seconds": stt_duration,
+                                    "stt_processing_time": stt_end_time,
+                                    "stt_start_time": stt_start_time
+                                }
+                            )
+                            logger.info(f"🔍 Updated unified trace with STT input: '{transcript_text[:50]}...' (duration: {stt_duration:.3f}s)")
+                            logger.info(f"✅ STT input logged to unified trace successfully")
+                        except Exception as e:
+                            logger.warning(f"⚠️ Failed to update STT input in unified trace: {e}")
             else:
-                logger.warning("⚠️ No conversation trace available for transcript update")
+                logger.warning(f"⚠️ Frame has no messages attribute or messages is empty")
+                logger.debug("📝 Frame content: {}", frame)
 
         except Exception as e:
             logger.warning(f"⚠️ Failed to handle transcript event: {e}")
@@ -568,6 +592,7 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
     async def handle_function_call_gemini(params: FunctionCallParams):
         """Handle function calls from Gemini Live."""
         function_start_time = time.time()  # Use different variable name for function-level timing
+        tool_execution_start_time = function_start_time  # Refined once the tool actually starts
         function_span = None
 
         # Note: Using unified Langfuse tracing via conversation_manager
@@ -604,7 +629,7 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
                 tool_response_data = {"raw_result": str(result)}
 
             # Log function call activity to unified trace
-            conversation_manager.log_activity_to_trace(
+            conversation_manager.buffer_activity(
                 user_id=user_id,
                 activity_type="tool_function_call",
                 data={
@@ -618,7 +643,7 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
             )
 
             # Log detailed tool response separately for better trace visibility
-            conversation_manager.log_activity_to_trace(
+            conversation_manager.buffer_activity(
                 user_id=user_id,
                 activity_type="tool_response",
                 data={
@@ -630,7 +655,7 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
                     "tool_execution_duration_seconds": tool_execution_duration,
                     "success": True,
                     "source": "voice",
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": fast_iso_now()
                 }
             )
 
@@ -640,7 +665,7 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
             tool_result_processing_end_time = time.time()
             tool_result_processing_duration = tool_result_processing_end_time - tool_result_processing_start_time
 
-            conversation_manager.log_activity_to_trace(
+            conversation_manager.buffer_activity(
                 user_id=user_id,
                 activity_type="tool_result_processing",
                 data={
@@ -652,17 +677,18 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
                 }
             )
 
-            log_api_call(
-                tool_name=params.function_name,
-                action="execute",
-                parameters=params.arguments,
-                result=result,
-                duration=duration,
-                success=True,
-                trace_id=conversation_trace,
-                user_id=user_id,
-                session_id=voice_session_id
-            )
+            if conversation_manager.is_session_sampled(user_id):
+                log_api_call(
+                    tool_name=params.function_name,
+                    action="execute",
+                    parameters=params.arguments,
+                    result=result,
+                    duration=duration,
+                    success=True,
+                    trace_id=conversation_trace,
+                    user_id=user_id,
+                    session_id=voice_session_id
+                )
 
             await params.result_callback({"result": result})
 
@@ -672,40 +698,31 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
             duration = end_time - function_start_time
 
             # Tool execution duration (from start to error)
-            tool_execution_end_time = time.time()
-            tool_execution_duration = tool_execution_end_time - tool_execution_start_time
+            tool_execution_duration = end_time - tool_execution_start_time
 
-            logger.error(f"❌ Function call error: {e}")
+            error_message = str(e)
+            logger.error(f"❌ Function call error: {error_message}")
 
-            # Log API call error metrics
-            # Log function call error to unified trace
+            # Export the buffered context, then the error and error response as one activity
+            conversation_manager.flush_activity_buffer(user_id)
             conversation_manager.log_activity_to_trace(
                 user_id=user_id,
                 activity_type="tool_function_call_error",
                 data={
                     "function_name": params.function_name,
-                    "arguments": params.arguments,
-                    "error": str(e),
-                    "total_duration_seconds": duration,
-                    "tool_execution_duration_seconds": tool_execution_duration,
-                    "success": False,
-                    "source": "voice"
-                }
-            )
-
-            # Log tool error response separately
-            conversation_manager.log_activity_to_trace(
-                user_id=user_id,
-                activity_type="tool_error_response",
-                data={
-                    "function_name": params.function_name,
-                    "error_response": str(e),
-                    "error_type": type(e).__name__,
                     "total_duration_seconds": duration,
                     "tool_execution_duration_seconds": tool_execution_duration,
                     "success": False,
                     "source": "voice",
-                    "timestamp": datetime.now().isoformat()
+                    "execution": {
+                        "arguments": params.arguments,
+                        "error": error_message
+                    },
+                    "response": {
+                        "error_response": error_message,
+                        "error_type": type(e).__name__,
+                        "timestamp": fast_iso_now()
+                    }
                 }
             )
 
@@ -713,16 +730,16 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
                 tool_name=params.function_name,
                 action="execute",
                 parameters=params.arguments,
-                result=str(e),
+                result=error_message,
                 duration=duration,
                 success=False,
-                error_message=str(e),
+                error_message=error_message,
                 trace_id=conversation_trace,
                 user_id=user_id,
                 session_id=voice_session_id
             )
 
-            await params.result_callback({"error": str(e)})
+            await params.result_callback({"error": error_message})
     
     # Register all tool functions
     tool_definitions = agent_manager.get_tool_definitions()
@@ -750,6 +767,9 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
     try:
         await runner.run(task)
 
+        # Clean run: routine activity is not exported
+        conversation_manager.discard_activity_buffer(user_id)
+
         # Update conversation session with completion
         conversation_manager.update_session_activity(user_id, conversation_type="voice")
         logger.info(f"✅ Voice conversation completed for user {user_id}")
@@ -757,6 +777,7 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
     except websockets.exceptions.ConnectionClosedError as e:
         logger.warning(f"⚠️ WebSocket connection closed during pipeline execution: {e}")
         # This is expected when the user disconnects, don't treat as error
+        conversation_manager.discard_activity_buffer(user_id)
 
         # Log connection closure to unified trace
         conversation_manager.log_activity_to_trace(
@@ -772,12 +793,10 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
 
     except Exception as e:
         logger.error(f"❌ Pipeline error: {e}")
+        conversation_manager.flush_activity_buffer(user_id)
 
         # Check if it's a Gemini service error that we should handle gracefully
-        if ("1011" in str(e) or
-            "internal error" in str(e).lower() or
-            "service is currently unavailable" in str(e).lower() or
-            "deadline expired" in str(e).lower()):
+        if _is_gemini_error(e):
             logger.warning("⚠️ Gemini service timeout or temporarily unavailable, attempting graceful degradation")
 
             # Send error message to user
@@ -819,11 +838,76 @@ async def run_simplified_conversation_bot_legacy(websocket: WebSocket, session_i
             pass  # WebSocket might already be closed
 
     finally:
+        # Drop session references so the agent manager and pipeline task can be collected
+        session_agents.pop(session_id, None)
+        session_websockets.pop(session_id, None)
+        agent_manager.task = None
+
         # Clean up Langfuse trace
         if conversation_trace and hasattr(conversation_trace, 'end'):
             conversation_trace.end()
 
 
+async def _get_or_create_text_agent(user_id: str, current_page: str):
+    """Get the user's text agent for a page, creating and initializing it if needed."""
+    page_agents = user_text_agents.setdefault(user_id, {})
+    user_text_agents_last_used[user_id] = time.monotonic()
+    agent = page_agents.get(current_page)
+    if agent is None:
+        agent = page_agents[current_page] = create_text_agent(user_id, current_page)
+        await agent.initialize()
+    return agent
+
+
+def _evict_idle_text_agents(max_idle_seconds: float = TEXT_AGENT_IDLE_SECONDS) -> int:
+    """Drop text agents for users idle longer than max_idle_seconds. Returns the number of users evicted."""
+    cutoff = time.monotonic() - max_idle_seconds
+    idle_users = [uid for uid, last_used in user_text_agents_last_used.items() if last_used < cutoff]
+    for uid in idle_users:
+        user_text_agents_last_used.pop(uid, None)
+        user_text_agents.pop(uid, None)
+    return len(idle_users)
+
+
+async def _queue_for_writer(queue: asyncio.Queue, writer_task: asyncio.Task, item: Any):
+    """
+    Hand an item to a websocket writer task through its bounded queue.
+
+    If the writer has died (its send failed), its error is re-raised so the session
+    ends instead of queueing replies that nothing will ever send.
+    """
+    if not writer_task.done():
+        try:
+            queue.put_nowait(item)
+            return
+        except asyncio.QueueFull:
+            # Writer is behind; wait for room, or for it to die
+            put = asyncio.ensure_future(queue.put(item))
+            await asyncio.wait((put, writer_task), return_when=asyncio.FIRST_COMPLETED)
+            if put.done():
+                return
+            put.cancel()
+    writer_task.result()
+    raise ConnectionError("websocket writer stopped")
+
+
+async def _stop_writer(writer_task: asyncio.Task):
+    """Cancel a websocket writer task and wait for it, retrieving any send error."""
+    writer_task.cancel()
+    try:
+        await writer_task
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        logger.debug("📤 Writer stopped after send error: {}", e)
+
+
+async def _text_reply_writer(websocket: WebSocket, out_queue: asyncio.Queue):
+    """Send queued text replies in order, one frame per reply."""
+    while True:
+        await websocket.send_text(await out_queue.get())
+
+
 async def run_text_conversation_bot(websocket: WebSocket, session_id: str, user_id: str, current_page: str = "broadband"):
     """Run text-only conversation bot."""
     logger.info(f"📝 Starting text bot - Session: {session_id}, User: {user_id}, Page: {current_page}")
@@ -835,15 +919,10 @@ async def run_text_conversation_bot(websocket: WebSocket, session_id: str, user_
         current_page = normalized_page
     else:
         logger.warning(f"⚠️ Invalid page name, using: {current_page}")
-        current_page = current_page.lower().strip().replace(" ", "-").replace("_", "-")
+        current_page = normalize_page_name(current_page)
 
     # Create or get text agent with current page context
-    agent_key = f"{user_id}_{current_page}"  # Use page-specific agent key
-    if agent_key not in user_text_agents:
-        user_text_agents[agent_key] = create_text_agent(user_id, current_page)
-        await user_text_agents[agent_key].initialize()
-    
-    agent = user_text_agents[agent_key]
+    agent = await _get_or_create_text_agent(user_id, current_page)
     
     # Update agent's current page if it changed
     if hasattr(agent, 'current_page'):
@@ -851,19 +930,22 @@ async def run_text_conversation_bot(websocket: WebSocket, session_id: str, user_
     if hasattr(agent, 'agent_manager') and agent.agent_manager:
         agent.agent_manager.update_current_page(current_page, user_id)
 
+    # Replies go through a writer task so sends never stall the receive loop
+    out_queue: asyncio.Queue = asyncio.Queue(maxsize=WRITER_QUEUE_SIZE)
+    writer_task = asyncio.create_task(_text_reply_writer(websocket, out_queue))
+
     # Handle messages
     try:
         while True:
             text_message = await websocket.receive_text()
-            logger.info(f"📝 Received: '{text_message[:50]}...'")
+            user_text_agents_last_used[user_id] = time.monotonic()
+            logger.debug("📝 Received: '{}...'", text_message[:50])
             
-            # Parse JSON if needed
-            if text_message.strip().startswith('{'):
+            # Parse JSON envelopes; plain text skips parsing entirely
+            if text_message[:1] == '{':
                 try:
-                    parsed = json.loads(text_message)
-                    if 'message' in parsed:
-                        text_message = parsed['message']
-                except:
+                    text_message = orjson.loads(text_message).get('message', text_message)
+                except orjson.JSONDecodeError:
                     pass
 
             try:
@@ -874,20 +956,24 @@ async def run_text_conversation_bot(websocket: WebSocket, session_id: str, user_
                 )
                 
                 if response_text and response_text.strip():
-                    await websocket.send_text(response_text)
-                    logger.info(f"📤 Response sent")
+                    reply = response_text
                 else:
-                    fallback = f"On the {current_page} page. What would you like to do?"
-                    await websocket.send_text(fallback)
+                    reply = f"On the {current_page} page. What would you like to do?"
 
             except asyncio.TimeoutError:
-                await websocket.send_text("Request timed out. Please try again.")
+                reply = "Request timed out. Please try again."
             except Exception as e:
                 logger.error(f"❌ Error processing message: {e}")
-                await websocket.send_text("I encountered an error processing your message.")
+                reply = "I encountered an error processing your message."
+
+            # Raises if the writer's last send failed, ending the session as before
+            await _queue_for_writer(out_queue, writer_task, reply)
+            logger.debug("📤 Response queued")
 
     except Exception as e:
         logger.info(f"📝 WebSocket closed: {e}")
+    finally:
+        await _stop_writer(writer_task)
 
 
 # Create router for voice agent endpoints
@@ -914,12 +1000,12 @@ async def websocket_endpoint(websocket: WebSocket):
         current_page = "broadband"  # Default page
     else:
         # Just normalize, don't reject
-        current_page = current_page.strip().lower().replace(" ", "-").replace("_", "-")
+        current_page = normalize_page_name(current_page)
     
     await websocket.accept()
     
     # Create session
-    session_id = str(uuid.uuid4())
+    session_id = os.urandom(16).hex()
     session_websockets[session_id] = websocket
     session_user_mapping[session_id] = user_id
     register_session_user(session_id, user_id)
@@ -930,12 +1016,11 @@ async def websocket_endpoint(websocket: WebSocket):
         await run_simplified_conversation_bot(websocket, session_id, user_id, current_page)
     except Exception as e:
         logger.error(f"❌ Voice bot error: {e}")
+        # Setup, timeout and Gemini errors surface here; export the buffered context
+        conversation_manager.flush_activity_buffer(user_id)
 
         # Check if it's a Gemini service error that should trigger fallback
-        is_gemini_error = ("1011" in str(e) or
-                          "internal error" in str(e).lower() or
-                          "service is currently unavailable" in str(e).lower() or
-                          "gemini" in str(e).lower())
+        is_gemini_error = _is_gemini_error(e)
 
         if is_gemini_error and settings.enable_voice_fallback:
             logger.warning("⚠️ Gemini service error detected, attempting fallback to text mode...")
@@ -958,10 +1043,23 @@ async def websocket_endpoint(websocket: WebSocket):
         unregister_session_user(session_id)
 
         # End conversation session
-        conversation_manager = get_conversation_manager()
         conversation_manager.end_session(user_id)
 
 
+# Pre-serialized head of the /ws/tools connection confirmation
+_CONFIRMATION_PREFIX = '{"type":"connection_confirmation","user_id":'
+
+
+def _connection_confirmation(user_id: str, current_page: str) -> str:
+    """Build the tool-socket confirmation JSON from the static prefix and the dynamic fields."""
+    # user_id is only stripped, so it is JSON-escaped rather than trusted verbatim
+    return (
+        f'{_CONFIRMATION_PREFIX}{orjson.dumps(user_id).decode()},'
+        f'"current_page":{orjson.dumps(current_page).decode()},'
+        f'"timestamp":"{fast_iso_now()}"}}'
+    )
+
+
 @router.websocket("/ws/tools")
 async def tools_websocket_endpoint(websocket: WebSocket):
     """Tool commands WebSocket endpoint."""
@@ -976,7 +1074,7 @@ async def tools_websocket_endpoint(websocket: WebSocket):
     user_id = user_id.strip()
     
     current_page = websocket.query_params.get("current_page", "broadband")
-    current_page = current_page.strip().lower().replace(" ", "-").replace("_", "-")
+    current_page = normalize_page_name(current_page)
     
     await websocket.accept()
     register_tool_websocket(user_id, websocket)
@@ -984,13 +1082,7 @@ async def tools_websocket_endpoint(websocket: WebSocket):
     logger.info(f"🔧 Tool WebSocket connected - User: {user_id}, Page: {current_page}")
     
     # Send confirmation
-    confirmation = {
-        "type": "connection_confirmation",
-        "user_id": user_id,
-        "current_page": current_page,
-        "timestamp": datetime.now().isoformat()
-    }
-    await websocket.send_json(confirmation)
+    await websocket.send_text(_connection_confirmation(user_id, current_page))
     
     try:
         while True:
@@ -999,11 +1091,13 @@ async def tools_websocket_endpoint(websocket: WebSocket):
                 "type": "echo_response",
                 "user_id": user_id,
                 "original_message": message,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": fast_iso_now()
             }
-            await websocket.send_json(echo)
-    except:
+            await websocket.send_text(orjson.dumps(echo).decode())
+    except WebSocketDisconnect:
         pass
+    except Exception as e:
+        logger.warning(f"⚠️ Tool WebSocket error for user {user_id}: {e}")
     finally:
         unregister_tool_websocket(user_id)
 
@@ -1026,10 +1120,10 @@ async def text_conversation_websocket_endpoint(websocket: WebSocket):
         current_page = "broadband"  # Default page instead of closing
     else:
         # Just normalize, don't reject
-        current_page = current_page.strip().lower().replace(" ", "-").replace("_", "-")
+        current_page = normalize_page_name(current_page)
     
     await websocket.accept()
-    session_id = str(uuid.uuid4())
+    session_id = os.urandom(16).hex()
     
     logger.info(f"📝 Text WebSocket connected - User: {user_id}, Page: {current_page}")
     
@@ -1039,46 +1133,58 @@ async def text_conversation_websocket_endpoint(websocket: WebSocket):
         logger.error(f"❌ Text bot error: {e}")
     finally:
         # End conversation session
-        conversation_manager = get_conversation_manager()
         conversation_manager.end_session(user_id)
 
 
+# Static part of the /health payload; the backend URL is fixed for the process lifetime
+_health_static: Optional[Dict[str, Any]] = None
+
+
+def _get_health_static() -> Dict[str, Any]:
+    """Build the static /health fields once and reuse them."""
+    global _health_static
+    if _health_static is None:
+        google_key = os.getenv("GOOGLE_API_KEY")
+        backend_url = get_backend_url()
+        ws_base_url = backend_url.replace('https://', 'wss://')
+        _health_static = {
+            "status": "healthy",
+            "version": "2.0.0",
+            "backend_url": backend_url,
+            "frontend_url": get_frontend_url(),
+            "environment": {
+                "mode": os.getenv("ENVIRONMENT", "development"),
+                "ssl_enabled": True
+            },
+            "llm_service": {
+                "provider": "Google Gemini",
+                "available": bool(google_key and google_key.startswith("AI")),
+                "model": "gemini-2.5-flash"
+            },
+            "websockets": {
+                "voice_conversation": f"{ws_base_url}/voice/ws?user_id=your_user_id&current_page=broadband",
+                "tools": f"{ws_base_url}/voice/ws/tools?user_id=your_user_id",
+                "text_conversation": f"{ws_base_url}/voice/ws/text-conversation?user_id=your_user_id&current_page=broadband"
+            },
+            "endpoints": {
+                "health": "/voice/health",
+                "connect": "/voice/connect",
+                "test_function_call": "/voice/test-function-call"
+            }
+        }
+    return _health_static
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint."""
-    google_key = os.getenv("GOOGLE_API_KEY")
-    gemini_available = bool(google_key and google_key.startswith("AI"))
-
     # Get conversation statistics
-    conversation_manager = get_conversation_manager()
     session_stats = conversation_manager.get_session_stats()
 
     return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "version": "2.0.0",
-        "backend_url": get_backend_url(),
-        "frontend_url": get_frontend_url(),
-        "environment": {
-            "mode": os.getenv("ENVIRONMENT", "development"),
-            "ssl_enabled": True
-        },
-        "llm_service": {
-            "provider": "Google Gemini",
-            "available": gemini_available,
-            "model": "gemini-2.5-flash"
-        },
-        "conversation_sessions": session_stats,
-        "websockets": {
-            "voice_conversation": f"{get_backend_url().replace('https://', 'wss://')}/voice/ws?user_id=your_user_id&current_page=broadband",
-            "tools": f"{get_backend_url().replace('https://', 'wss://')}/voice/ws/tools?user_id=your_user_id",
-            "text_conversation": f"{get_backend_url().replace('https://', 'wss://')}/voice/ws/text-conversation?user_id=your_user_id&current_page=broadband"
-        },
-        "endpoints": {
-            "health": "/voice/health",
-            "connect": "/voice/connect",
-            "test_function_call": "/voice/test-function-call"
-        }
+        **_get_health_static(),
+        "timestamp": fast_iso_now(),
+        "conversation_sessions": session_stats
     }
 
 
@@ -1113,7 +1219,7 @@ async def bot_connect(request: Request):
     user_id = user_id.strip()
     
     # Normalize current_page
-    current_page = current_page.lower().replace(" ", "-").replace("_", "-")
+    current_page = normalize_page_name(current_page)
     
     backend_url = get_backend_url()
     ws_base_url = backend_url.replace("https://", "wss://").replace("http://", "ws://")
@@ -1141,14 +1247,14 @@ async def test_function_call():
             "tool_available": True,
             "tools_count": len(tool_definitions),
             "tools": [tool.name for tool in tool_definitions],
-            "timestamp": datetime.now().isoformat()
+            "timestamp": fast_iso_now()
         }
     except Exception as e:
         logger.error(f"❌ Function call test failed: {e}")
         return {
             "message": f"Function call test failed: {str(e)}",
             "tool_available": False,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": fast_iso_now()
         }
 
 
@@ -1156,11 +1262,10 @@ async def test_function_call():
 @router.get("/memory/{user_id}")
 async def get_user_memory(user_id: str, current_page: str = "broadband"):
     """Get memory for a specific user."""
-    agent_key = f"{user_id}_{current_page}"
-    if agent_key not in user_text_agents:
+    text_agent = user_text_agents.get(user_id, {}).get(current_page)
+    if text_agent is None:
         return {"memory": [], "message": "No memory found for user"}
     
-    text_agent = user_text_agents[agent_key]
     memory_data = await text_agent.get_memory()
     return {"memory": memory_data, "user_id": user_id, "current_page": current_page}
 
@@ -1168,11 +1273,10 @@ async def get_user_memory(user_id: str, current_page: str = "broadband"):
 @router.delete("/memory/{user_id}")
 async def clear_user_memory(user_id: str, current_page: str = "broadband"):
     """Clear memory for a specific user."""
-    agent_key = f"{user_id}_{current_page}"
-    if agent_key not in user_text_agents:
+    text_agent = user_text_agents.get(user_id, {}).get(current_page)
+    if text_agent is None:
         return {"message": f"No memory found for user {user_id} on page {current_page}"}
     
-    text_agent = user_text_agents[agent_key]
     success = await text_agent.clear_memory()
     
     if success:
@@ -1184,12 +1288,7 @@ async def clear_user_memory(user_id: str, current_page: str = "broadband"):
 @router.post("/memory/{user_id}/save")
 async def save_user_memory(user_id: str, current_page: str = "broadband"):
     """Save memory for a specific user."""
-    agent_key = f"{user_id}_{current_page}"
-    if agent_key not in user_text_agents:
-        user_text_agents[agent_key] = create_text_agent(user_id, current_page)
-        await user_text_agents[agent_key].initialize()
-    
-    text_agent = user_text_agents[agent_key]
+    text_agent = await _get_or_create_text_agent(user_id, current_page)
     if hasattr(text_agent, 'save_memory'):
         memory_data = await text_agent.save_memory()
         return memory_data
@@ -1202,12 +1301,7 @@ async def save_user_memory(user_id: str, current_page: str = "broadband"):
 @router.post("/memory/{user_id}/load")
 async def load_user_memory(user_id: str, memory_data: dict, current_page: str = "broadband"):
     """Load memory for a specific user."""
-    agent_key = f"{user_id}_{current_page}"
-    if agent_key not in user_text_agents:
-        user_text_agents[agent_key] = create_text_agent(user_id, current_page)
-        await user_text_agents[agent_key].initialize()
-    
-    text_agent = user_text_agents[agent_key]
+    text_agent = await _get_or_create_text_agent(user_id, current_page)
     if hasattr(text_agent, 'load_memory'):
         success = await text_agent.load_memory(memory_data.get("memory", []))
         
@@ -1224,25 +1318,31 @@ async def cleanup_text_agent(user_id: str, current_page: str = None):
     """Clean up text agent for a specific user."""
     if current_page:
         # Clean up specific page agent
-        agent_key = f"{user_id}_{current_page}"
-        if agent_key in user_text_agents:
-            text_agent = user_text_agents[agent_key]
+        page_agents = user_text_agents.get(user_id, {})
+        if current_page in page_agents:
+            text_agent = page_agents.pop(current_page)
+            if not page_agents:
+                user_text_agents.pop(user_id, None)
+                user_text_agents_last_used.pop(user_id, None)
             if hasattr(text_agent, 'save_memory'):
                 await text_agent.save_memory()
-            del user_text_agents[agent_key]
             return {"message": f"Text agent cleaned up for user {user_id} on page {current_page}"}
         else:
             return {"error": f"No text agent found for user {user_id} on page {current_page}"}
     else:
         # Clean up all agents for this user
-        cleaned_count = 0
-        keys_to_delete = [key for key in user_text_agents.keys() if key.startswith(f"{user_id}_")]
-        for key in keys_to_delete:
-            text_agent = user_text_agents[key]
-            if hasattr(text_agent, 'save_memory'):
-                await text_agent.save_memory()
-            del user_text_agents[key]
-            cleaned_count += 1
+        agents = list(user_text_agents.pop(user_id, {}).values())
+        user_text_agents_last_used.pop(user_id, None)
+        cleaned_count = len(agents)
+
+        # Save all pages concurrently; one failed save must not block the rest
+        results = await asyncio.gather(
+            *(agent.save_memory() for agent in agents if hasattr(agent, 'save_memory')),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"⚠️ Failed to save text agent memory for user {user_id}: {result}")
         
         if cleaned_count > 0:
             return {"message": f"Cleaned up {cleaned_count} text agents for user {user_id}"}
@@ -1255,11 +1355,13 @@ def create_app():
     """Create and configure the FastAPI application."""
     from fastapi import FastAPI
     from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import ORJSONResponse
     
     app = FastAPI(
         title="Agent Voice Backend",
         description="Voice agent backend with /voice prefix endpoints",
-        version="1.0.0"
+        version="1.0.0",
+        default_response_class=ORJSONResponse
     )
     
     # Configure CORS - allow both HTTP and HTTPS for development
@@ -1284,8 +1386,11 @@ def create_app():
     @app.on_event("startup")
     async def startup_event():
         """Initialize all services on startup."""
-        # Initialize conversation manager
-        conversation_manager = get_conversation_manager()
+        # Precompute the static /health payload
+        _get_health_static()
+
+        # Export conversation trace activity off the request path
+        conversation_manager.start_trace_worker()
 
         # Initialize postal code service (uses service layer)
         try:
@@ -1300,16 +1405,24 @@ def create_app():
         logger.info("🚀 Starting conversation cleanup task")
 
         async def cleanup_task():
-            """Periodic cleanup of inactive conversations."""
+            """Periodic cleanup of inactive conversations, less often when idle."""
+            retry_delay = 60
             while True:
                 try:
                     conversation_manager.cleanup_inactive_sessions()
+                    evicted = _evict_idle_text_agents()
+                    if evicted:
+                        logger.debug(f"🧹 Evicted idle text agents for {evicted} users")
                     stats = conversation_manager.get_session_stats()
-                    logger.debug(f"🧹 Conversation cleanup completed. Active sessions: {stats['total_active_sessions']}")
-                    await asyncio.sleep(300)  # Clean up every 5 minutes
+                    active_sessions = stats['total_active_sessions']
+                    logger.debug(f"🧹 Conversation cleanup completed. Active sessions: {active_sessions}")
+                    retry_delay = 60
+                    # 15 minutes when idle, 5 minutes under load
+                    await asyncio.sleep(900 if active_sessions == 0 else 300)
                 except Exception as e:
-                    logger.warning(f"⚠️ Conversation cleanup failed: {e}")
-                    await asyncio.sleep(60)  # Retry in 1 minute on error
+                    logger.warning(f"⚠️ Conversation cleanup failed: {e}, retrying in {retry_delay}s")
+                    await asyncio.sleep(retry_delay)
+                    retry_delay = min(retry_delay * 2, 300)  # Back off on persistent failures
 
         # Start cleanup task
         asyncio.create_task(cleanup_task())
@@ -1318,6 +1431,8 @@ def create_app():
     @app.on_event("shutdown")
     async def shutdown_event():
         """Cleanup on shutdown."""
+        await conversation_manager.stop_trace_worker()
+
         if 'postal_code_service' in globals() and postal_code_service:
             try:
                 # PostalCodeService handles shutdown internally via singleton pattern
@@ -1341,5 +1456,8 @@ if __name__ == "__main__":
         port=8200,
         # ssl_keyfile="./frontend/certificates/localhost-key.pem",
         # ssl_certfile="./frontend/certificates/localhost.pem",
+        loop="auto",  # uvloop when installed (not on Windows), else asyncio
+        http="httptools",
+        ws="websockets",
         log_level="info"
     )
\ No newline at end of file
@@ -14,15 +14,20 @@ OPTIMIZED VERSION WITH BROADBAND TOOL INTEGRATION:
 """
 
 import os
+import re
+import sys
 import json
 import asyncio
 import time
 import uuid
 from typing import Dict, Any, Optional, List, Union, Tuple
 from datetime import datetime, timedelta
-from functools import partial
-from collections import OrderedDict
+from functools import partial, lru_cache
+from operator import itemgetter
+from collections import deque
+from contextvars import ContextVar
 
+import orjson
 from loguru import logger
 from dotenv import load_dotenv
 
@@ -53,14 +58,15 @@ try:
         get_langfuse_tracer, trace_conversation, log_api_call,
         calculate_response_quality_score, extract_conversation_insights, score_conversation_quality
     )
+    from ..utils.time_utils import fast_iso_now
 except ImportError:
     # Fallback for direct execution
-    import sys
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     from ..config.settings import get_settings, MSSQL_SEARCH_AI_SYSTEM_INSTRUCTION
     from .websocket_registry import get_registry
     from .agent_manager import create_agent_manager
     from ..utils.langfuse_tracing import get_langfuse_tracer, trace_conversation, log_api_call
+    from ..utils.time_utils import fast_iso_now
 
 load_dotenv(override=True)
 
@@ -69,83 +75,153 @@ load_dotenv(override=True)
 # BROADBAND-SPECIFIC OPTIMIZATION CLASSES
 # ============================================================================
 
+# Schema of a per-user broadband context; mutable fields are filled in by _new_context()
+_CONTEXT_TEMPLATE: Dict[str, Any] = {
+    "last_parameters": None,
+    "confirmed_postcode": None,
+    "scraped_data": None,
+    "recommendations": None,
+    "search_history": None,
+    "preferences": None,
+    "last_updated": 0.0,
+    "query_count": 0
+}
+
+
+# Context fields reported by get_broadband_statistics; every context has all of them
+_STATS_FIELDS = itemgetter("query_count", "confirmed_postcode", "search_history",
+                           "last_parameters", "last_updated")
+
+
+def _new_context(confirmed_postcode: Optional[str] = None,
+                 preferences: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Create a fresh broadband context from the template."""
+    context = _CONTEXT_TEMPLATE.copy()
+    context["last_parameters"] = {}
+    context["confirmed_postcode"] = confirmed_postcode
+    context["search_history"] = deque(maxlen=10)
+    context["preferences"] = preferences if preferences is not None else {}
+    context["last_updated"] = time.monotonic()
+    return context
+
+
+def _reset_context(context: Dict[str, Any]):
+    """Reset an expired context in place, reusing the dict and its history deque."""
+    confirmed_postcode = context.get("confirmed_postcode")
+    preferences = context.get("preferences")
+    search_history = context.get("search_history")
+    
+    context.clear()
+    context.update(_CONTEXT_TEMPLATE)
+    # last_parameters may be a caller-owned dict, so replace it rather than clearing it
+    context["last_parameters"] = {}
+    context["confirmed_postcode"] = confirmed_postcode
+    if search_history is not None:
+        search_history.clear()
+    else:
+        search_history = deque(maxlen=10)
+    context["search_history"] = search_history
+    context["preferences"] = preferences if preferences is not None else {}
+    context["last_updated"] = time.monotonic()
+
+
+def _wall_clock(monotonic_ts: float) -> datetime:
+    """Convert a time.monotonic() timestamp to the wall-clock datetime it corresponds to."""
+    return datetime.now() - timedelta(seconds=time.monotonic() - monotonic_ts)
+
+
 class BroadbandContextManager:
     """
     Manages broadband search context and state per user.
     Tracks parameters, results, and conversation flow for optimized interactions.
     """
     
-    def __init__(self):
-        self.user_contexts: Dict[str, Dict[str, Any]] = {}
-        self.context_timeout = timedelta(hours=24)  # Context expires after 24 hours
+    def __init__(self, max_users: int = 1000, sweep_interval: int = 256):
+        self.user_contexts: Dict[str, Dict[str, Any]] = {}  # Insertion order doubles as LRU order
+        self.context_timeout = 24 * 3600.0  # Context expires after 24 hours (seconds)
+        self.max_users = max_users
+        self.sweep_interval = sweep_interval
+        self._calls_since_sweep = 0
+    
+    def _maybe_sweep(self):
+        """Every sweep_interval calls, drop heavy payloads from stale contexts."""
+        self._calls_since_sweep += 1
+        if self._calls_since_sweep < self.sweep_interval:
+            return
+        self._calls_since_sweep = 0
+        
+        cutoff = time.monotonic() - self.context_timeout
+        for context in self.user_contexts.values():
+            if context["last_updated"] < cutoff:
+                # Postcode and preferences survive expiry, so keep the context itself
+                context["scraped_data"] = None
+                context["recommendations"] = None
     
     def get_or_create_context(self, user_id: str) -> Dict[str, Any]:
         """Get or create broadband context for user."""
-        if user_id not in self.user_contexts:
-            self.user_contexts[user_id] = {
-                "last_parameters": {},
-                "confirmed_postcode": None,
-                "scraped_data": None,
-                "recommendations": None,
-                "search_history": [],
-                "preferences": {},
-                "last_updated": datetime.now(),
-                "query_count": 0
-            }
-        else:
-            # Check if context has expired
-            context = self.user_contexts[user_id]
-            if datetime.now() - context["last_updated"] > self.context_timeout:
-                logger.info(f"🔄 Broadband context expired for user {user_id}, resetting")
-                self.user_contexts[user_id] = {
-                    "last_parameters": {},
-                    "confirmed_postcode": context.get("confirmed_postcode"),  # Keep postcode
-                    "scraped_data": None,
-                    "recommendations": None,
-                    "search_history": [],
-                    "preferences": context.get("preferences", {}),  # Keep preferences
-                    "last_updated": datetime.now(),
-                    "query_count": 0
-                }
+        self._maybe_sweep()
+        
+        context = self.user_contexts.pop(user_id, None)
+        if context is None:
+            context = _new_context()
+        elif time.monotonic() - context["last_updated"] > self.context_timeout:
+            # Context has expired; reset it in place, keeping postcode and preferences
+            logger.debug("🔄 Broadband context expired for user {}, resetting", user_id)
+            _reset_context(context)
+        
+        # Re-insert as most recently used and evict the least recently used user
+        self.user_contexts[user_id] = context
+        if len(self.user_contexts) > self.max_users:
+            evicted_user = next(iter(self.user_contexts))
+            del self.user_contexts[evicted_user]
+            logger.debug("🗑️ Evicted broadband context for least recently used user {}", evicted_user)
         
-        return self.user_contexts[user_id]
+        return context
+    
+    def get_context(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get broadband context for user without creating one for unknown users."""
+        if user_id not in self.user_contexts:
+            return None
+        return self.get_or_create_context(user_id)
     
     def update_parameters(self, user_id: str, parameters: Dict[str, Any]):
         """Update last known parameters for user."""
         context = self.get_or_create_context(user_id)
-        context["last_parameters"] = parameters
-        context["last_updated"] = datetime.now()
-        logger.info(f"📝 Updated broadband parameters for user {user_id}")
+        # Parameter names are a small fixed vocabulary; intern them so every context shares one copy
+        context["last_parameters"] = {
+            sys.intern(key) if isinstance(key, str) else key: value
+            for key, value in parameters.items()
+        }
+        context["last_updated"] = time.monotonic()
+        logger.debug("📝 Updated broadband parameters for user {}", user_id)
     
     def update_postcode(self, user_id: str, postcode: str):
         """Update confirmed postcode for user."""
         context = self.get_or_create_context(user_id)
-        context["confirmed_postcode"] = postcode
-        context["last_updated"] = datetime.now()
-        logger.info(f"📍 Updated confirmed postcode for user {user_id}: {postcode}")
+        context["confirmed_postcode"] = sys.intern(postcode) if isinstance(postcode, str) else postcode
+        context["last_updated"] = time.monotonic()
+        logger.debug("📍 Updated confirmed postcode for user {}: {}", user_id, postcode)
     
     def get_last_parameters(self, user_id: str) -> Dict[str, Any]:
         """Get last known parameters for user."""
-        context = self.get_or_create_context(user_id)
-        return context.get("last_parameters", {})
+        context = self.get_context(user_id)
+        return context.get("last_parameters", {}) if context else {}
     
     def get_confirmed_postcode(self, user_id: str) -> Optional[str]:
         """Get confirmed postcode for user."""
-        context = self.get_or_create_context(user_id)
-        return context.get("confirmed_postcode")
+        context = self.get_context(user_id)
+        return context.get("confirmed_postcode") if context else None
     
     def add_search_to_history(self, user_id: str, query: str, parameters: Dict[str, Any]):
         """Add search to history."""
         context = self.get_or_create_context(user_id)
+        # Bounded deque keeps only the last 10 searches
         context["search_history"].append({
             "query": query,
             "parameters": parameters,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": fast_iso_now()
         })
         context["query_count"] += 1
-        # Keep only last 10 searches
-        if len(context["search_history"]) > 10:
-            context["search_history"] = context["search_history"][-10:]
     
     def clear_context(self, user_id: str):
         """Clear broadband context for user."""
@@ -161,59 +237,145 @@ class BroadbandCacheManager:
     """
     
     def __init__(self, max_size: int = 100, ttl_minutes: int = 30):
-        self.cache: OrderedDict = OrderedDict()
+        self.cache: Dict[Tuple[str, tuple], Tuple[Any, float]] = {}
         self.max_size = max_size
-        self.ttl = timedelta(minutes=ttl_minutes)
+        self.ttl_s = ttl_minutes * 60.0
+    
+    def _generate_cache_key(self, key_type: str, *args) -> Tuple[str, tuple]:
+        """
+        Generate cache key from arguments.
+
+        The key is the (key_type, args) tuple itself, so every arg must be
+        hashable; pass dict-valued params as frozenset(d.items()).
+        """
+        return (key_type, args)
     
-    def _generate_cache_key(self, key_type: str, *args) -> str:
-        """Generate cache key from arguments."""
+    @staticmethod
+    def _fmt_key(key: Tuple[str, tuple]) -> str:
+        """Format a cache key for log messages."""
+        key_type, args = key
         return f"{key_type}::{':'.join(str(arg) for arg in args)}"
     
-    def _is_expired(self, timestamp: datetime) -> bool:
+    def _is_expired(self, deadline: float) -> bool:
         """Check if cache entry is expired."""
-        return datetime.now() - timestamp > self.ttl
+        return time.monotonic() > deadline
     
     def get(self, key_type: str, *args) -> Optional[Any]:
         """Get value from cache."""
         key = self._generate_cache_key(key_type, *args)
-        if key in self.cache:
-            value, timestamp = self.cache[key]
-            if not self._is_expired(timestamp):
-                # Move to end (most recently used)
-                self.cache.move_to_end(key)
-                logger.info(f"🎯 Cache hit for {key_type}")
-                return value
-            else:
-                # Expired, remove it
-                del self.cache[key]
-                logger.info(f"⏰ Cache expired for {key_type}")
-        return None
+        entry = self.cache.pop(key, None)
+        if entry is None:
+            return None
+        
+        value, deadline = entry
+        if self._is_expired(deadline):
+            # Expired, leave it removed
+            logger.debug("⏰ Cache expired for {}", key_type)
+            return None
+        
+        # Re-insert at the end (most recently used); dicts keep insertion order
+        self.cache[key] = entry
+        logger.debug("🎯 Cache hit for {}", key_type)
+        return value
     
     def set(self, key_type: str, value: Any, *args):
         """Set value in cache."""
         key = self._generate_cache_key(key_type, *args)
-        self.cache[key] = (value, datetime.now())
+        self.cache[key] = (value, time.monotonic() + self.ttl_s)
         
         # Enforce max size (LRU eviction)
         if len(self.cache) > self.max_size:
             # Remove oldest entry
             oldest_key = next(iter(self.cache))
-            del self.cache[oldest_key]
-            logger.info(f"🗑️ Evicted oldest cache entry: {oldest_key}")
+            self.cache.pop(oldest_key)
+            logger.opt(lazy=True).debug("🗑️ Evicted oldest cache entry: {}", lambda: self._fmt_key(oldest_key))
         
-        logger.info(f"💾 Cached {key_type} (cache size: {len(self.cache)})")
+        logger.debug("💾 Cached {} (cache size: {})", key_type, len(self.cache))
     
     def invalidate(self, key_type: str, *args):
         """Invalidate specific cache entry."""
         key = self._generate_cache_key(key_type, *args)
         if key in self.cache:
             del self.cache[key]
-            logger.info(f"🗑️ Invalidated cache for {key_type}")
+            logger.debug("🗑️ Invalidated cache for {}", key_type)
     
     def clear(self):
         """Clear all cache."""
         self.cache.clear()
         logger.info("🗑️ Cleared all cache")
+    
+    def __len__(self) -> int:
+        return len(self.cache)
+
+
+# UK postcode, e.g. "E14 9WB"
+_POSTCODE_RE = re.compile(r'\b([A-Z]{1,2}[0-9][A-Z0-9]?\s?[0-9][A-Z]{2})\b', re.IGNORECASE)
+
+# Broadband query detection keywords
+BROADBAND_KEYWORDS: Tuple[str, ...] = (
+    'broadband', 'internet', 'fibre', 'fiber', 'wifi', 'connection',
+    'speed', 'mbps', 'mb', 'provider', 'isp', 'deal', 'package',
+    'bt', 'sky', 'virgin', 'talktalk', 'plusnet', 'vodafone',
+    'postcode', 'contract', 'monthly cost'
+)
+
+# Intent detection keywords, highest priority first
+INTENT_KEYWORDS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("get_cheapest", ('cheapest', 'lowest cost', 'affordable')),
+    ("get_fastest", ('fastest', 'highest speed', 'quickest')),
+    ("compare_providers", ('compare', 'comparison', 'versus', 'vs')),
+    ("get_recommendations", ('recommend', 'suggest', 'best', 'top')),
+    ("refine_search", ('filter', 'refine', 'change', 'modify')),
+    ("list_providers", ('list', 'show all', 'available providers')),
+)
+
+
+def _compile_keyword_pattern(keywords) -> "re.Pattern":
+    """Compile keywords into one substring-matching alternation, longest first."""
+    return re.compile("|".join(map(re.escape, sorted(keywords, key=len, reverse=True))))
+
+
+def _compile_intent_pattern(intents) -> "re.Pattern":
+    """
+    Compile all intent keywords into a single scanner.
+
+    Each intent becomes a named group (i0, i1, ...) in priority order inside a
+    zero-width lookahead, so one finditer() pass tries every start position and
+    reports the highest-priority keyword beginning there.
+    """
+    groups = "|".join(
+        f"(?P<i{index}>{_compile_keyword_pattern(words).pattern})"
+        for index, (_, words) in enumerate(intents)
+    )
+    return re.compile(f"(?=(?:{groups}))")
+
+
+_BROADBAND_KEYWORD_RE = _compile_keyword_pattern(BROADBAND_KEYWORDS)
+_INTENT_RE = _compile_intent_pattern(INTENT_KEYWORDS)
+_INTENT_LABELS = tuple(intent for intent, _ in INTENT_KEYWORDS)
+_MIN_BROADBAND_KEYWORD_LEN = min(map(len, BROADBAND_KEYWORDS))
+
+
+@lru_cache(maxsize=512)
+def _match_broadband(query_lower: str) -> bool:
+    """Check a lowercased query against the broadband keywords (cached per query)."""
+    return _BROADBAND_KEYWORD_RE.search(query_lower) is not None
+
+
+@lru_cache(maxsize=512)
+def _match_intent(query_lower: str) -> str:
+    """Return the highest-priority intent in a lowercased query (cached per query)."""
+    best = len(_INTENT_LABELS)
+    for match in _INTENT_RE.finditer(query_lower):
+        index = int(match.lastgroup[1:])
+        if index < best:
+            best = index
+            if best == 0:
+                break
+    
+    if best < len(_INTENT_LABELS):
+        return _INTENT_LABELS[best]
+    return "query"
 
 
 class BroadbandQueryOptimizer:
@@ -226,46 +388,27 @@ class BroadbandQueryOptimizer:
         self.context_manager = context_manager
         
         # Broadband query detection patterns
-        self.broadband_keywords = [
-            'broadband', 'internet', 'fibre', 'fiber', 'wifi', 'connection',
-            'speed', 'mbps', 'mb', 'provider', 'isp', 'deal', 'package',
-            'bt', 'sky', 'virgin', 'talktalk', 'plusnet', 'vodafone',
-            'postcode', 'contract', 'monthly cost'
-        ]
+        self.broadband_keywords = list(BROADBAND_KEYWORDS)
     
     def is_broadband_query(self, query: str) -> bool:
         """Detect if query is related to broadband."""
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in self.broadband_keywords)
+        if len(query) < _MIN_BROADBAND_KEYWORD_LEN:
+            return False
+        return _match_broadband(query.lower())
     
     def detect_intent(self, query: str) -> str:
         """Detect primary intent of broadband query."""
-        query_lower = query.lower()
-        
-        # Intent detection patterns
-        if any(word in query_lower for word in ['cheapest', 'lowest cost', 'affordable']):
-            return "get_cheapest"
-        elif any(word in query_lower for word in ['fastest', 'highest speed', 'quickest']):
-            return "get_fastest"
-        elif any(word in query_lower for word in ['compare', 'comparison', 'versus', 'vs']):
-            return "compare_providers"
-        elif any(word in query_lower for word in ['recommend', 'suggest', 'best', 'top']):
-            return "get_recommendations"
-        elif any(word in query_lower for word in ['filter', 'refine', 'change', 'modify']):
-            return "refine_search"
-        elif any(word in query_lower for word in ['list', 'show all', 'available providers']):
-            return "list_providers"
-        else:
-            return "query"
+        return _match_intent(query.lower())
     
     def optimize_parameters(self, user_id: str, new_params: Dict[str, Any]) -> Dict[str, Any]:
         """
         Optimize parameters by merging with previous context.
         Auto-fills missing parameters from user's history.
         """
-        # Get last known parameters
-        last_params = self.context_manager.get_last_parameters(user_id)
-        confirmed_postcode = self.context_manager.get_confirmed_postcode(user_id)
+        # Get last known parameters from a single context lookup
+        context = self.context_manager.get_context(user_id) or {}
+        last_params = context.get("last_parameters", {})
+        confirmed_postcode = context.get("confirmed_postcode")
         
         # Merge parameters (new params override old)
         optimized = {**last_params, **new_params}
@@ -273,13 +416,13 @@ class BroadbandQueryOptimizer:
         # Auto-fill postcode if confirmed
         if not optimized.get('postcode') and confirmed_postcode:
             optimized['postcode'] = confirmed_postcode
-            logger.info(f"✨ Auto-filled postcode from context: {confirmed_postcode}")
+            logger.debug("✨ Auto-filled postcode from context: {}", confirmed_postcode)
         
         return optimized
     
     def suggest_next_action(self, user_id: str, current_intent: str) -> Optional[str]:
         """Suggest next logical action based on context."""
-        context = self.context_manager.get_or_create_context(user_id)
+        context = self.context_manager.get_context(user_id) or {}
         
         # If no postcode confirmed yet, suggest postcode input
         if not context.get("confirmed_postcode"):
@@ -316,29 +459,156 @@ class WebSocketCallbackHandler:
                 "action": "completed",
                 "data": {
                     "result": result,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": fast_iso_now()
                 }
             }
         )
 
 
+# Calling user and their AgentManager for the shared page tools, set per agent invocation
+_CURRENT_USER_ID: ContextVar[str] = ContextVar("text_agent_user_id")
+_CURRENT_AGENT_MANAGER: ContextVar[Any] = ContextVar("text_agent_agent_manager")
+
+
+class _MockFunctionCall:
+    """Minimal function-call object accepted by AgentManager.handle_function_call."""
+
+    __slots__ = ("name", "arguments")
+
+    def __init__(self, name: str, arguments: Dict[str, Any]):
+        self.name = name
+        self.arguments = arguments
+
+
 if LANGCHAIN_AVAILABLE:
-    def create_page_tool_function(
-        function_name: str,
-        page_name: str,
-        user_id: str,
-        agent_manager: Any,
-        callback_handler: Any
-    ):
+    # Chat memory message type -> role name in memory dicts (other message types are skipped)
+    _MESSAGE_ROLES = {HumanMessage: "user", AIMessage: "assistant"}
+
+    class BaseArgsModel(BaseModel):
+        """Base model with JSON parsing for dict fields."""
+
+        @field_validator('*', mode='before')
+        @classmethod
+        def parse_json_fields(cls, v, info):
+            """Parse JSON strings for dict fields."""
+            if info.field_name in cls.__annotations__ and cls.__annotations__[info.field_name] == dict:
+                if isinstance(v, str):
+                    try:
+                        return orjson.loads(v)
+                    except ValueError:  # orjson.JSONDecodeError subclasses ValueError
+                        raise ValueError(f"Invalid JSON string for {info.field_name}: {v}")
+            return v
+
+    @lru_cache(maxsize=256)
+    def _make_literal(values: tuple) -> Any:
+        """
+        Build a Literal type for enum values, shared across tools with the same enum.
+        
+        Subscripting with a tuple unpacks it, so Literal[('a', 'b')] == Literal['a', 'b'].
+        """
+        return Literal[values]
+
+    def _tool_args_spec(tool_def: Any) -> tuple:
+        """
+        Reduce a tool definition's properties to a hashable signature.
+        
+        Each entry is (name, type, enum values, array item type, required, description),
+        in declaration order so the generated model keeps the same field order.
+        """
+        required = set(tool_def.required) if getattr(tool_def, 'required', None) else set()
+        return tuple(
+            (
+                prop_name,
+                prop_info.get("type", "string"),
+                tuple(prop_info.get("enum") or ()),
+                prop_info.get("items", {}).get("type", "string"),
+                prop_name in required,
+                prop_info.get("description", ""),
+            )
+            for prop_name, prop_info in tool_def.properties.items()
+            # Skip user_id as we inject it automatically
+            if prop_name != "user_id"
+        )
+
+    @lru_cache(maxsize=512)
+    def _build_args_schema(tool_name: str, spec: tuple) -> type:
+        """Build the dynamic Pydantic args model for a tool signature (cached per signature)."""
+        fields = {}
+        for prop_name, prop_type, enum_values, items_type, is_required, description in spec:
+            if enum_values:
+                # Create Literal type for enum
+                try:
+                    field_type = _make_literal(enum_values)
+                except TypeError:
+                    # Fallback to str if Literal creation fails (e.g. unhashable values)
+                    field_type = str
+                field_description = description
+                # Add enum values to description for clarity
+                field_description += f" Valid values: {', '.join(map(str, enum_values))}"
+            else:
+                # Determine field type normally
+                field_type = str  # Default to string
+                field_description = description
+                
+                if prop_type == "integer":
+                    field_type = int
+                elif prop_type == "number":
+                    field_type = float
+                elif prop_type == "boolean":
+                    field_type = bool
+                elif prop_type == "object":
+                    field_type = dict
+                elif prop_type == "array":
+                    # Handle array types properly with items specification
+                    if items_type == "string":
+                        field_type = List[str]
+                    elif items_type == "integer":
+                        field_type = List[int]
+                    elif items_type == "number":
+                        field_type = List[float]
+                    elif items_type == "boolean":
+                        field_type = List[bool]
+                    elif items_type == "object":
+                        field_type = List[dict]
+                    else:
+                        field_type = list  # Fallback to untyped list
+            
+            # Create field with optional annotation
+            if is_required:
+                fields[prop_name] = (field_type, Field(..., description=field_description))
+            else:
+                fields[prop_name] = (Optional[field_type], Field(None, description=field_description))
+        
+        # Only models with a plain dict field need the JSON-parsing validator;
+        # the rest inherit BaseModel directly and skip it
+        has_dict_field = any(field_type is dict for field_type, _ in fields.values())
+
+        # Create the dynamic model class
+        return create_model(
+            f"{tool_name}_args",
+            **fields,
+            __base__=BaseArgsModel if has_dict_field else BaseModel
+        )
+
+    def _get_args_schema(tool_def: Any) -> type:
+        """Get the args model for a tool definition, reusing one model per signature."""
+        spec = _tool_args_spec(tool_def)
+        try:
+            return _build_args_schema(tool_def.name, spec)
+        except TypeError:
+            # Unhashable schema details (e.g. list-valued "type"); build without caching
+            return _build_args_schema.__wrapped__(tool_def.name, spec)
+
+    def create_page_tool_function(function_name: str, page_name: str):
         """
         Create an async function for a page-specific tool that routes through AgentManager.
         
+        The function is shared by every user on the page: the calling user's id and
+        AgentManager are read from the context set by LangChainTextAgent.process_message.
+        
         Args:
             function_name: Name of the function (e.g., "tables_action")
             page_name: Page name (e.g., "tables")
-            user_id: User ID for session management
-            agent_manager: AgentManager instance
-            callback_handler: WebSocket callback handler
             
         Returns:
             Async function that executes the tool
@@ -346,20 +616,14 @@ if LANGCHAIN_AVAILABLE:
         async def tool_function(**kwargs) -> str:
             """Execute page-specific tool action via AgentManager."""
             try:
-                logger.info(f"🔧 LangChain Tool - Tool: {function_name}, Page: {page_name}, User: {user_id}")
-                logger.info(f"🔧 Tool call arguments: {kwargs}")
+                user_id = _CURRENT_USER_ID.get()
+                agent_manager = _CURRENT_AGENT_MANAGER.get()
                 
-                # Create mock function call for agent manager
-                class MockFunctionCall:
-                    def __init__(self, name, arguments):
-                        self.name = name
-                        self.arguments = arguments
+                logger.info("🔧 LangChain Tool - Tool: {}, Page: {}, User: {}", function_name, page_name, user_id)
+                logger.info("🔧 Tool call arguments: {}", kwargs)
                 
-                # Ensure user_id is in arguments
-                arguments = {"user_id": user_id, **kwargs}
-                
-                # Create mock function call
-                mock_call = MockFunctionCall(function_name, arguments)
+                # Create mock function call, ensuring user_id is in arguments
+                mock_call = _MockFunctionCall(function_name, {"user_id": user_id, **kwargs})
                 
                 # Execute through agent manager
                 result = await agent_manager.handle_function_call(mock_call)
@@ -367,13 +631,11 @@ if LANGCHAIN_AVAILABLE:
                 # NOTE: Tools send their own detailed WebSocket messages via send_websocket_message()
                 # in base_tool.py. We don't send a duplicate wrapped version here.
                 
-                logger.info(f"✅ LangChain tool executed successfully: {function_name}")
+                logger.info("✅ LangChain tool executed successfully: {}", function_name)
                 return result
 
             except Exception as e:
-                logger.error(f"❌ Tool error for {function_name}: {e}")
-                import traceback
-                logger.error(f"Traceback: {traceback.format_exc()}")
+                logger.opt(exception=True).error("❌ Tool error for {}: {}", function_name, e)
                 error_msg = f"Error executing {function_name}: {str(e)}"
                 
                 # NOTE: Tools handle their own error WebSocket messages via _handle_error()
@@ -406,15 +668,75 @@ else:
             return f"Mock {self.page_name} action completed"
 
 
-def create_langchain_tools_from_agent_manager(user_id: str, callback_handler=None, current_page: str = "broadband"):
+# Page name -> LangChain tools shared by every user on that page
+_PAGE_TOOLS: Dict[str, List[Any]] = {}
+
+
+def _get_page_tools(current_page: str, agent_manager: Any) -> List[Any]:
+    """
+    Get the page's LangChain tools, building them on first use.
+    
+    Tool names, descriptions, args schemas and tool functions depend only on the
+    page (the tool functions read the calling user from context), so one set of
+    StructuredTools serves every user.
+    """
+    tools = _PAGE_TOOLS.get(current_page)
+    if tools is not None:
+        return tools
+    
+    # Deduplicate by name up front, keeping the first definition
+    # (e.g., database_query_action from both database-query and database-query-results)
+    tool_definitions: Dict[str, Any] = {}
+    for tool_def in agent_manager.get_tool_definitions():
+        tool_definitions.setdefault(tool_def.name, tool_def)
+    
+    tools = []
+    for tool_def in tool_definitions.values():
+        try:
+            # Extract page name from tool definition name (e.g., "users_action" -> "users")
+            page_name = tool_def.name.replace("_action", "")
+            
+            # Convert Pipecat schema properties to a LangChain args_schema,
+            # shared by every tool definition with the same signature
+            ArgsSchema = _get_args_schema(tool_def)
+            
+            # Create async-only StructuredTool: the executor is always awaited, and a
+            # sync call raises NotImplementedError instead of nesting an event loop
+            structured_tool = StructuredTool(
+                name=tool_def.name,
+                description=tool_def.description,
+                func=None,
+                coroutine=create_page_tool_function(tool_def.name, page_name),  # Async function
+                args_schema=ArgsSchema
+            )
+            
+            tools.append(structured_tool)
+            logger.info(f"✅ Created StructuredTool for {tool_def.name} ({page_name} page) with {len(ArgsSchema.model_fields)} parameters")
+            
+        except Exception as e:
+            logger.opt(exception=True).error("❌ Error creating adapter for {}: {}", tool_def.name, e)
+            continue
+    
+    # Only cache a complete build so a transient failure is retried next session
+    if tools:
+        _PAGE_TOOLS[current_page] = tools
+    return tools
+
+
+def create_langchain_tools_from_agent_manager(user_id: str, callback_handler=None, current_page: str = "broadband",
+                                              agent_manager: Any = None):
     """
     Factory function to create LangChain tools from the modular tool structure.
     Creates page-specific StructuredTools that expose all action types and parameters.
     
+    The returned tools are shared across users; callers must run them with the
+    user's id and AgentManager set in context (see LangChainTextAgent.process_message).
+    
     Args:
         user_id: User ID for session management
         callback_handler: Optional WebSocket callback handler
         current_page: Current page context for the agent
+        agent_manager: AgentManager to read tool definitions from (created if not given)
         
     Returns:
         List of LangChain StructuredTools that wrap each page-specific tool
@@ -424,163 +746,200 @@ def create_langchain_tools_from_agent_manager(user_id: str, callback_handler=Non
         return []
     
     try:
-        # Create agent manager with current page context
-        agent_manager = create_agent_manager(current_page=current_page)
-        
-        # Get all tool definitions from agent manager
-        tool_definitions = agent_manager.get_tool_definitions()
+        langchain_tools = _PAGE_TOOLS.get(current_page)
+        if langchain_tools is None:
+            # Create agent manager with current page context
+            if agent_manager is None:
+                agent_manager = create_agent_manager(current_page=current_page)
+            langchain_tools = _get_page_tools(current_page, agent_manager)
         
-        if not tool_definitions:
+        if not langchain_tools:
             logger.error("❌ No tool definitions found in agent manager")
             return []
         
-        # Create page-specific StructuredTools for each tool
-        langchain_tools = []
-        seen_tool_names = set()  # Track tool names to avoid duplicates
-        
-        for tool_def in tool_definitions:
-            try:
-                # Skip duplicate tool names (e.g., database_query_action from both database-query and database-query-results)
-                if tool_def.name in seen_tool_names:
-                    logger.info(f"⚠️ Skipping duplicate tool: {tool_def.name}")
-                    continue
-                seen_tool_names.add(tool_def.name)
-                
-                # Extract page name from tool definition name (e.g., "users_action" -> "users")
-                page_name = tool_def.name.replace("_action", "")
-                
-                # Create tool function
-                tool_func = create_page_tool_function(
-                    function_name=tool_def.name,
-                    page_name=page_name,
-                    user_id=user_id,
-                    agent_manager=agent_manager,
-                    callback_handler=callback_handler
-                )
-                
-                # Convert Pipecat schema properties to LangChain args_schema
-                # Create a dynamic Pydantic model for the tool arguments
-                fields = {}
-                for prop_name, prop_info in tool_def.properties.items():
-                    # Skip user_id as we inject it automatically
-                    if prop_name == "user_id":
-                        continue
-                    
-                    # Check for enum constraint first
-                    enum_values = prop_info.get("enum")
-                    
-                    if enum_values and len(enum_values) > 0:
-                        # Create Literal type for enum (unpack the list into Literal args)
-                        # Literal expects literal arguments, not a tuple
-                        try:
-                            # Create Literal dynamically using __class_getitem__
-                            field_type = Literal.__class_getitem__(tuple(enum_values))
-                        except:
-                            # Fallback to str if Literal creation fails
-                            field_type = str
-                        field_description = prop_info.get("description", "")
-                        # Add enum values to description for clarity
-                        field_description += f" Valid values: {', '.join(map(str, enum_values))}"
-                    else:
-                        # Determine field type normally
-                        prop_type = prop_info.get("type", "string")
-                        field_type = str  # Default to string
-                        field_description = prop_info.get("description", "")
-                        
-                        if prop_type == "integer":
-                            field_type = int
-                        elif prop_type == "number":
-                            field_type = float
-                        elif prop_type == "boolean":
-                            field_type = bool
-                        elif prop_type == "object":
-                            field_type = dict
-                        elif prop_type == "array":
-                            # Handle array types properly with items specification
-                            items_info = prop_info.get("items", {})
-                            items_type = items_info.get("type", "string")
-                            
-                            if items_type == "string":
-                                field_type = List[str]
-                            elif items_type == "integer":
-                                field_type = List[int]
-                            elif items_type == "number":
-                                field_type = List[float]
-                            elif items_type == "boolean":
-                                field_type = List[bool]
-                            elif items_type == "object":
-                                field_type = List[dict]
-                            else:
-                                field_type = list  # Fallback to untyped list
-                    
-                    # Create field with optional annotation
-                    is_required = prop_name in tool_def.required if hasattr(tool_def, 'required') and tool_def.required else False
-                    
-                    if is_required:
-                        fields[prop_name] = (field_type, Field(..., description=field_description))
-                    else:
-                        fields[prop_name] = (Optional[field_type], Field(None, description=field_description))
-                
-                # Create dynamic Pydantic model for args with JSON parsing for dict fields
-                class BaseArgsModel(BaseModel):
-                    """Base model with JSON parsing for dict fields."""
-
-                    @field_validator('*', mode='before')
-                    @classmethod
-                    def parse_json_fields(cls, v, info):
-                        """Parse JSON strings for dict fields."""
-                        if info.field_name in cls.__annotations__ and cls.__annotations__[info.field_name] == dict:
-                            if isinstance(v, str):
-                                try:
-                                    import json
-                                    return json.loads(v)
-                                except (json.JSONDecodeError, ValueError):
-                                    raise ValueError(f"Invalid JSON string for {info.field_name}: {v}")
-                        return v
-
-                # Create the dynamic model class inheriting from BaseArgsModel
-                ArgsSchema = create_model(
-                    f"{tool_def.name}_args",
-                    **fields,
-                    __base__=BaseArgsModel
-                )
-                
-                # Create StructuredTool
-                # Use a closure to capture tool_func correctly
-                def create_sync_wrapper(async_func):
-                    def sync_func(**kwargs):
-                        return asyncio.run(async_func(**kwargs))
-                    return sync_func
-                
-                structured_tool = StructuredTool(
-                    name=tool_def.name,
-                    description=tool_def.description,
-                    func=create_sync_wrapper(tool_func),  # Sync wrapper with proper closure
-                    coroutine=tool_func,  # Async function
-                    args_schema=ArgsSchema
-                )
-                
-                langchain_tools.append(structured_tool)
-                logger.info(f"✅ Created StructuredTool for {tool_def.name} ({page_name} page) with {len(fields)} parameters")
-                
-            except Exception as e:
-                logger.error(f"❌ Error creating adapter for {tool_def.name}: {e}")
-                import traceback
-                logger.error(f"Traceback: {traceback.format_exc()}")
-                continue
-        
-        logger.info(f"✅ Created {len(langchain_tools)} LangChain tool adapters for user {user_id}")
-        logger.info(f"🔧 Available tools: {[t.name for t in langchain_tools]}")
+        logger.info("✅ Using {} LangChain tool adapters for user {}", len(langchain_tools), user_id)
+        logger.opt(lazy=True).info("🔧 Available tools: {}", lambda: [t.name for t in langchain_tools])
         
         return langchain_tools
         
     except Exception as e:
-        logger.error(f"❌ Error creating LangChain tools: {e}")
-        import traceback
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        logger.opt(exception=True).error("❌ Error creating LangChain tools: {}", e)
         return []
 
 
+@lru_cache(maxsize=8)
+def _get_llm(api_key: str, model: str, temperature: float, max_output_tokens: int) -> Any:
+    """Get the process-wide Gemini chat model for a configuration, so users share its HTTP client."""
+    return ChatGoogleGenerativeAI(
+        model=model,
+        google_api_key=api_key,
+        temperature=temperature,
+        max_output_tokens=max_output_tokens,
+    )
+
+
+# Static parts of the tool guidance appended to each page's system instruction
+_TOOL_GUIDANCE_HEADER = """
+## 🔧 AVAILABLE TOOLS FOR CURRENT PAGE ({current_page}):
+
+You have access to {tool_count} specialized tools for broadband comparison.
+
+### Tool Selection Rules:
+1. **For broadband operations**: Use `broadband_action` tool with appropriate action_type
+2. **Check the tool description** to see what actions are available
+
+### Available Tools:
+"""
+
+_TOOL_GUIDANCE_FOOTER = """
+
+### Current Page Guidance:
+- You are currently on the **{current_page}** page
+- Use the **broadband_action** tool for all broadband comparison operations
+- Available actions include: query, generate_url, get_recommendations, compare_providers, get_cheapest, get_fastest, list_providers, open_url
+
+### Important:
+- Each tool has specific action_type enums - only use valid action types
+- Read the tool descriptions carefully to understand what actions are supported
+- If unsure, check the tool's description for the list of valid action types
+"""
+
+BROADBAND_GUIDANCE = """
+
+## 🌐 BROADBAND TOOL - SPECIAL GUIDANCE:
+
+### CONVERSATIONAL MODE - Build Requirements Piece by Piece:
+- **NEW**: Support for building broadband requirements incrementally
+- User can provide postcode first, then speed, then contract, etc.
+- **URLs auto-generate** when minimum parameters (postcode + speed) are available
+- **No scraping or recommendations until explicitly requested**
+- System remembers parameters across conversation turns
+
+### Automatic Postcode Validation:
+- Postcodes are AUTOMATICALLY validated with regex and matched against database using fuzzy search
+- The system AUTO-SELECTS the best match (100% match or highest score)
+- **NO USER CONFIRMATION NEEDED** - postcode selection happens in the background
+- Simply pass the postcode in your query - the tool handles validation and matching
+
+### Natural Language Processing:
+- The broadband tool has advanced AI parameter extraction
+- It understands queries like:
+  - "Find broadband in E14 9WB with 100Mb speed and 12 month contract"
+  - "Show me cheapest deals from BT and Sky"
+  - "I want superfast fibre with unlimited calls"
+  - "Compare Virgin Media and TalkTalk in Manchester"
+
+### CONVERSATIONAL PARAMETER HANDLING:
+- **action_type="query"** now supports BOTH natural language AND individual parameters
+- If you get individual parameters (postcode, speed_in_mb, etc.), treat as parameter updates
+- URLs will auto-generate when postcode + speed are available
+- Example conversational flow:
+  - User: "I need broadband in E14 9WB" → Tool updates postcode, no URL yet
+  - User: "100Mb speed please" → Tool updates speed, auto-generates URL
+  - User: "Change to 24 months" → Tool updates contract, regenerates URL
+
+### Action Types Available:
+1. **query** - Process natural language OR handle parameter updates
+   - Natural language: user_id="123", action_type="query", query="Find 100Mb broadband in SW1A 1AA"
+   - Parameter updates: user_id="123", action_type="query", postcode="E14 9WB", speed_in_mb="55Mb"
+   - Automatically extracts and updates parameters incrementally
+   - URLs auto-generate when sufficient parameters available
+
+2. **generate_url** - Generate comparison URL with explicit parameters
+   - Use when parameters are already known
+   - Example: user_id="123", action_type="generate_url", postcode="E149WB", speed_in_mb="100Mb"
+
+3. **get_recommendations** - Get AI-powered deal recommendations (only when requested)
+   - Analyzes scraped data and provides personalized suggestions
+   - Example: user_id="123", action_type="get_recommendations"
+
+4. **compare_providers** - Compare specific providers
+   - Example: user_id="123", action_type="compare_providers", providers="BT,Sky,Virgin Media"
+
+5. **get_cheapest** - Find cheapest available deal
+6. **get_fastest** - Find fastest available deal
+7. **list_providers** - Show all available providers
+8. **filter_data** - Apply filters to existing results
+9. **refine_search** - Refine search parameters
+
+### CONVERSATIONAL MEMORY:
+- System maintains broadband parameters across conversation turns
+- **Auto-fills** previously mentioned parameters
+- **Auto-generates URLs** when minimum requirements met
+- **Only scrapes/recommends** when explicitly asked
+
+### Example Usage Patterns:
+
+**CONVERSATIONAL FLOW (RECOMMENDED):**
+```
+User: "I need broadband in E14 9WB"
+Tool Call: broadband_action(
+  user_id="123",
+  action_type="query",
+  postcode="E14 9WB"
+)
+# Response: Parameters updated, waiting for more info
+
+User: "100Mb speed with Hyperoptic"
+Tool Call: broadband_action(
+  user_id="123",
+  action_type="query",
+  speed_in_mb="100Mb",
+  providers="Hyperoptic"
+)
+# Response: URL auto-generated with all parameters
+
+User: "Actually, change that to 24 months"
+Tool Call: broadband_action(
+  user_id="123",
+  action_type="query",
+  contract_length="24 months"
+)
+# Response: URL updated with new contract length
+```
+
+**Natural Language Query (still supported):**
+```
+User: "Find broadband deals in E14 9WB with 100Mb speed"
+Tool Call: broadband_action(
+  user_id="123",
+  action_type="query",
+  query="Find broadband deals in E14 9WB with 100Mb speed"
+)
+```
+
+**Explicit Actions (when intent is clear):**
+```
+User: "Show me recommendations"
+Tool Call: broadband_action(
+  user_id="123",
+  action_type="get_recommendations"
+)
+# Uses current parameters from conversation state
+
+User: "Compare BT and Virgin Media"
+Tool Call: broadband_action(
+  user_id="123",
+  action_type="compare_providers",
+  providers="BT,Virgin Media"
+)
+```
+
+### Best Practices:
+1. **CONVERSATIONAL FIRST**: Use individual parameters with action_type="query" to build requirements incrementally
+2. **AUTO-GENERATION**: URLs generate automatically when postcode + speed are available - no need to explicitly request
+3. **NATURAL FLOW**: Users can say "postcode first", then "speed", then "contract" - parameters accumulate naturally
+4. **Don't ask for postcode confirmation** - System auto-selects best match
+5. **Only scrape/recommend when asked** - URLs generate immediately, but data analysis only on request
+6. **Use specific action types** (get_recommendations, compare_providers, etc.) when user explicitly asks for analysis
+7. **Trust parameter accumulation** - System remembers and auto-fills previous parameters
+"""
+
+
+# Page name -> tool-calling agent runnable (prompt | llm with bound tool schemas)
+_PAGE_AGENTS: Dict[str, Any] = {}
+
+
 class LangChainTextAgent:
     """
     Enhanced LangChain-based conversational AI agent with broadband optimization.
@@ -606,11 +965,14 @@ class LangChainTextAgent:
         self.langfuse_tracer = get_langfuse_tracer()
         self.langchain_callback_handler = None
         self.current_trace = None
+        self._invoke_config = None
         
         # Broadband optimization components
         self.broadband_context = BroadbandContextManager()
         self.broadband_cache = BroadbandCacheManager(max_size=100, ttl_minutes=30)
         self.broadband_optimizer = BroadbandQueryOptimizer(self.broadband_context)
+        # This agent's own context; the manager resets it in place, so the reference stays valid
+        self._ctx = self.broadband_context.get_or_create_context(user_id)
 
     async def initialize(self):
         """Initialize the LangChain agent with tools and memory."""
@@ -622,11 +984,11 @@ class LangChainTextAgent:
             if not self.settings.google_api_key:
                 raise ValueError("GOOGLE_API_KEY not found in environment variables")
 
-            self.llm = ChatGoogleGenerativeAI(
-                model="gemini-2.5-flash",
-                google_api_key=self.settings.google_api_key,
-                temperature=self.settings.temperature,
-                max_output_tokens=self.settings.max_output_tokens,
+            self.llm = _get_llm(
+                self.settings.google_api_key,
+                "gemini-2.5-flash",
+                self.settings.temperature,
+                self.settings.max_output_tokens,
             )
 
             # Initialize memory
@@ -648,7 +1010,8 @@ class LangChainTextAgent:
             tools = create_langchain_tools_from_agent_manager(
                 user_id=self.user_id,
                 callback_handler=self.callback_handler,
-                current_page=self.current_page
+                current_page=self.current_page,
+                agent_manager=self.agent_manager
             )
             
             if not tools:
@@ -657,27 +1020,32 @@ class LangChainTextAgent:
             
             logger.info(f"✅ Created {len(tools)} LangChain tools from modular structure")
 
-            # Get system instruction with page context
-            system_instruction = self.agent_manager.get_system_instruction_with_page_context(self.user_id)
-            
-            # Add tool-specific guidance
-            tool_guidance = self._generate_tool_guidance(tools, self.current_page)
-            system_instruction += f"\n\n{tool_guidance}"
-
-            # Create prompt template with page-aware system instruction
-            prompt = ChatPromptTemplate.from_messages([
-                SystemMessage(content=system_instruction),
-                MessagesPlaceholder(variable_name="chat_history"),
-                ("human", "{input}"),
-                MessagesPlaceholder(variable_name="agent_scratchpad"),
-            ])
-
-            # Create the agent
-            agent = create_tool_calling_agent(
-                llm=self.llm,
-                tools=tools,
-                prompt=prompt
-            )
+            # The prompt and tool-calling agent only depend on the page (the agent binds
+            # tool schemas, not the per-user tool functions), so share them across users
+            agent = _PAGE_AGENTS.get(self.current_page)
+            if agent is None:
+                # Get system instruction with page context
+                system_instruction = self.agent_manager.get_system_instruction_with_page_context(self.user_id)
+                
+                # Add tool-specific guidance
+                tool_guidance = self._generate_tool_guidance(tools, self.current_page)
+                system_instruction += f"\n\n{tool_guidance}"
+
+                # Create prompt template with page-aware system instruction
+                prompt = ChatPromptTemplate.from_messages([
+                    SystemMessage(content=system_instruction),
+                    MessagesPlaceholder(variable_name="chat_history"),
+                    ("human", "{input}"),
+                    MessagesPlaceholder(variable_name="agent_scratchpad"),
+                ])
+
+                # Create the agent
+                agent = create_tool_calling_agent(
+                    llm=self.llm,
+                    tools=tools,
+                    prompt=prompt
+                )
+                _PAGE_AGENTS[self.current_page] = agent
 
             # Create agent executor (using manual trace logging instead of LangChain callbacks)
             self.agent_executor = AgentExecutor(
@@ -690,14 +1058,18 @@ class LangChainTextAgent:
                 max_iterations=5  # Increased for more complex tool interactions
             )
 
+            # Per-user invoke config; user_id is fixed for this agent, so build it once
+            self._invoke_config = RunnableConfig(
+                tags=[f"user_{self.user_id}"],
+                metadata={"langfuse_user_id": self.user_id}
+            )
+
             self.initialized = True
             logger.info(f"✅ LangChain TextAgent initialized for user {self.user_id} on page {self.current_page}")
             logger.info(f"🔧 Available pages via AgentManager: {self.agent_manager.get_available_pages()}")
 
         except Exception as e:
-            logger.error(f"❌ Failed to initialize LangChain TextAgent for user {self.user_id}: {e}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.opt(exception=True).error("❌ Failed to initialize LangChain TextAgent for user {}: {}", self.user_id, e)
             raise
 
     async def process_message(self, message: str) -> str:
@@ -726,13 +1098,16 @@ class LangChainTextAgent:
         # The trace is a LangfuseSpan object, we need its id as string
         trace_id = trace.id if trace and hasattr(trace, 'id') else None
 
-        logger.info(f"📝 Using unified conversation session {conversation_session_id} for text (user: {self.user_id})")
+        logger.info("📝 Using unified conversation session {} for text (user: {})", conversation_session_id, self.user_id)
+
+        # Collect this turn's trace activities and log them together when the turn ends
+        activities = conversation_manager.begin_activity_batch(self.user_id)
 
         try:
             if not self.initialized:
                 await self.initialize()
 
-            logger.info(f"📝 Processing message for user {self.user_id}: {message[:100]}...")
+            logger.info("📝 Processing message for user {}: {}...", self.user_id, message[:100])
             
             # ============================================================
             # BROADBAND QUERY OPTIMIZATION - Pre-Processing
@@ -746,42 +1121,42 @@ class LangChainTextAgent:
             if self.current_page == "broadband" or self.broadband_optimizer.is_broadband_query(message):
                 is_broadband_query = True
                 broadband_intent = self.broadband_optimizer.detect_intent(message)
+                # Normalized message, reused as the response cache key
+                norm_msg = message.strip().lower()
                 
-                logger.info(f"🌐 Detected broadband query - Intent: {broadband_intent}")
+                logger.info("🌐 Detected broadband query - Intent: {}", broadband_intent)
                 
                 # Check cache for similar queries
-                cached_response = self.broadband_cache.get("response", self.user_id, message.lower().strip())
+                cached_response = self.broadband_cache.get("response", self.user_id, norm_msg)
                 if cached_response and broadband_intent == "query":
-                    logger.info(f"🎯 Found cached response for broadband query")
+                    logger.info("🎯 Found cached response for broadband query")
                     return cached_response
                 
-                # Get broadband context
-                bb_context = self.broadband_context.get_or_create_context(self.user_id)
+                # Get broadband context once for this turn
+                bb_context = self._own_context()
+                postcode = bb_context["confirmed_postcode"]
                 
                 # Add context hint to message for better LLM understanding
-                if bb_context.get("confirmed_postcode"):
-                    postcode = bb_context["confirmed_postcode"]
-                    logger.info(f"📍 Auto-filling context: postcode={postcode}")
+                if postcode:
+                    logger.info("📍 Auto-filling context: postcode={}", postcode)
                     
                     # Don't modify the message, let the tool handle context internally
                     # The tool will auto-fill from its own conversation state
                 
                 # Log broadband query activity
-                conversation_manager.log_activity_to_trace(
-                    user_id=self.user_id,
+                activities.add(
                     activity_type="broadband_query_detected",
                     data={
                         "query": message,
                         "intent": broadband_intent,
-                        "has_cached_postcode": bb_context.get("confirmed_postcode") is not None,
-                        "query_count": bb_context.get("query_count", 0) + 1,
+                        "has_cached_postcode": postcode is not None,
+                        "query_count": bb_context["query_count"] + 1,
                         "session_id": conversation_session_id
                     }
                 )
 
             # Log message activity to unified trace
-            conversation_manager.log_activity_to_trace(
-                user_id=self.user_id,
+            activities.add(
                 activity_type="text_message",
                 data={
                     "message": message,
@@ -793,13 +1168,17 @@ class LangChainTextAgent:
             )
 
             # Process the message through the agent (using manual trace logging)
-            result = await self.agent_executor.ainvoke(
-                {"input": message},
-                config=RunnableConfig(
-                    tags=[f"user_{self.user_id}"],
-                    metadata={"langfuse_user_id": self.user_id}
+            # The page tools are shared across users; tell them who is calling
+            user_token = _CURRENT_USER_ID.set(self.user_id)
+            agent_manager_token = _CURRENT_AGENT_MANAGER.set(self.agent_manager)
+            try:
+                result = await self.agent_executor.ainvoke(
+                    {"input": message},
+                    config=self._invoke_config
                 )
-            )
+            finally:
+                _CURRENT_AGENT_MANAGER.reset(agent_manager_token)
+                _CURRENT_USER_ID.reset(user_token)
 
             response_text = result["output"]
             intermediate_steps = result.get("intermediate_steps", [])
@@ -812,55 +1191,11 @@ class LangChainTextAgent:
             used_broadband_tool = False
             broadband_tool_action = None
             
-            # Check if broadband tool was called in intermediate steps
-            for step in intermediate_steps:
-                tool_action = step[0] if len(step) > 0 else None
-                if tool_action and hasattr(tool_action, 'tool'):
-                    tool_name = tool_action.tool
-                    if 'broadband' in tool_name.lower():
-                        used_broadband_tool = True
-                        if hasattr(tool_action, 'tool_input'):
-                            broadband_tool_action = tool_action.tool_input.get('action_type')
-                        break
-            
-            # If broadband query was processed, update context and cache
-            if is_broadband_query and used_broadband_tool:
-                logger.info(f"🌐 Broadband tool was used - updating context and cache")
-                
-                # Cache the response for similar future queries
-                if broadband_intent == "query" and response_text:
-                    self.broadband_cache.set("response", response_text, self.user_id, message.lower().strip())
-                    logger.info(f"💾 Cached broadband response")
-                
-                # Update broadband context based on tool action
-                bb_context = self.broadband_context.get_or_create_context(self.user_id)
-                
-                # Extract postcode from response if present (for context tracking)
-                # Look for patterns like "postcode: E14 9WB" or "E14 9WB" in response
-                import re
-                postcode_pattern = r'\b([A-Z]{1,2}[0-9][A-Z0-9]?\s?[0-9][A-Z]{2})\b'
-                postcode_matches = re.findall(postcode_pattern, response_text, re.IGNORECASE)
-                if postcode_matches:
-                    # Update confirmed postcode in context
-                    confirmed_postcode = postcode_matches[0].strip().upper()
-                    self.broadband_context.update_postcode(self.user_id, confirmed_postcode)
-                
-                # Log broadband result
-                conversation_manager.log_activity_to_trace(
-                    user_id=self.user_id,
-                    activity_type="broadband_result",
-                    data={
-                        "intent": broadband_intent,
-                        "tool_action": broadband_tool_action,
-                        "response_length": len(response_text),
-                        "used_cache": False,  # This was a fresh result
-                        "session_id": conversation_session_id
-                    }
-                )
-
-            # Log tool usage and API calls with detailed information
+            # Single pass over intermediate steps: log each tool call with detailed
+            # information and note the first broadband tool call along the way
             if intermediate_steps:
-                logger.info(f"🔧 Agent used {len(intermediate_steps)} tools")
+                logger.info("🔧 Agent used {} tools", len(intermediate_steps))
+                log_api_calls = conversation_manager.is_session_sampled(self.user_id)
                 for i, step in enumerate(intermediate_steps):
                     # Log each tool call with comprehensive details
                     tool_action = step[0] if len(step) > 0 else None
@@ -871,12 +1206,15 @@ class LangChainTextAgent:
 
                     if tool_action and hasattr(tool_action, 'tool'):
                         tool_name = tool_action.tool
+                        if not used_broadband_tool and 'broadband' in tool_name.lower():
+                            used_broadband_tool = True
+                            if hasattr(tool_action, 'tool_input'):
+                                broadband_tool_action = tool_action.tool_input.get('action_type')
                     if tool_action and hasattr(tool_action, 'tool_input'):
                         tool_input = tool_action.tool_input
 
                     # Log detailed tool call activity
-                    conversation_manager.log_activity_to_trace(
-                        user_id=self.user_id,
+                    activities.add(
                         activity_type="text_tool_call",
                         data={
                             "step_number": i + 1,
@@ -891,25 +1229,54 @@ class LangChainTextAgent:
                     )
 
                     # Also log to the legacy API call system for compatibility
-                    log_api_call(
-                        tool_name=tool_name,
-                        action="execute",
-                        parameters=tool_input,
-                        result=tool_result,
-                        duration=0.0,
-                        success=True,
-                        trace_id=trace_id,  # Use string trace_id, not span object
-                        user_id=self.user_id,
-                        session_id=conversation_session_id
-                    )
+                    if log_api_calls:
+                        log_api_call(
+                            tool_name=tool_name,
+                            action="execute",
+                            parameters=tool_input,
+                            result=tool_result,
+                            duration=0.0,
+                            success=True,
+                            trace_id=trace_id,  # Use string trace_id, not span object
+                            user_id=self.user_id,
+                            session_id=conversation_session_id
+                        )
+            
+            # If broadband query was processed, update context and cache
+            if is_broadband_query and used_broadband_tool:
+                logger.info("🌐 Broadband tool was used - updating context and cache")
+                
+                # Cache the response for similar future queries
+                if broadband_intent == "query" and response_text:
+                    self.broadband_cache.set("response", response_text, self.user_id, norm_msg)
+                    logger.info("💾 Cached broadband response")
+                
+                # Extract postcode from response if present (for context tracking)
+                # Look for patterns like "postcode: E14 9WB" or "E14 9WB" in response
+                postcode_match = _POSTCODE_RE.search(response_text)
+                if postcode_match:
+                    # Update confirmed postcode in context
+                    confirmed_postcode = postcode_match.group(1).strip().upper()
+                    self.broadband_context.update_postcode(self.user_id, confirmed_postcode)
+                
+                # Log broadband result
+                activities.add(
+                    activity_type="broadband_result",
+                    data={
+                        "intent": broadband_intent,
+                        "tool_action": broadband_tool_action,
+                        "response_length": len(response_text),
+                        "used_cache": False,  # This was a fresh result
+                        "session_id": conversation_session_id
+                    }
+                )
 
             # Log final response metrics
             end_time = time.time()
             duration = end_time - start_time
 
             # Log response activity to unified trace
-            conversation_manager.log_activity_to_trace(
-                user_id=self.user_id,
+            activities.add(
                 activity_type="text_response",
                 data={
                     "response": response_text,
@@ -938,8 +1305,8 @@ class LangChainTextAgent:
                     comment=f"Response length: {len(response_text)}, Tools used: {len(intermediate_steps)}, Duration: {duration:.2f}s, Quality score: {quality_score:.3f}"
                 )
 
-                # Add conversation-level insights and scoring
-                memory_messages = await self.get_memory()
+                # Add conversation-level insights and scoring over the memory window
+                memory_messages = self._recent_memory_messages()
                 if memory_messages:
                     conversation_insights = extract_conversation_insights(memory_messages, trace_id)  # Use string trace_id
                     if conversation_insights.get("conversation_score"):
@@ -954,18 +1321,17 @@ class LangChainTextAgent:
             # Tools send their own detailed structured messages directly via send_websocket_message()
             # in base_tool.py. The final LLM response is only returned, not sent to WebSocket.
 
-            logger.info(f"✅ Message processed for user {self.user_id}, returning response (not sent to WebSocket)")
+            logger.info("✅ Message processed for user {}, returning response (not sent to WebSocket)", self.user_id)
             return response_text
 
         except Exception as e:
             end_time = time.time()
             duration = end_time - start_time
 
-            logger.error(f"❌ Error processing message for user {self.user_id}: {e}")
+            logger.error("❌ Error processing message for user {}: {}", self.user_id, e)
 
             # Log error activity to unified trace
-            conversation_manager.log_activity_to_trace(
-                user_id=self.user_id,
+            activities.add(
                 activity_type="text_error",
                 data={
                     "error": str(e),
@@ -975,15 +1341,6 @@ class LangChainTextAgent:
                 }
             )
 
-            if trace_id:
-                self.langfuse_tracer.score_trace(
-                    trace_id=trace_id,  # Use string trace_id, not span object
-                    name="error_score",
-                    value=1,
-                    data_type="BINARY",
-                    comment=f"Error: {str(e)}"
-                )
-
             error_msg = f"I apologize, but I encountered an error processing your message: {str(e)}"
 
             # Send error to WebSocket
@@ -995,29 +1352,61 @@ class LangChainTextAgent:
                     "action": "error_occurred",
                     "data": {
                         "error": str(e),
-                        "timestamp": datetime.now().isoformat()
+                        "timestamp": fast_iso_now()
                     }
                 }
             )
 
+            # Score after the user has been told; the activity above is flushed in finally
+            if trace_id:
+                self.langfuse_tracer.score_trace(
+                    trace_id=trace_id,  # Use string trace_id, not span object
+                    name="error_score",
+                    value=1,
+                    data_type="BINARY",
+                    comment=f"Error: {str(e)}"
+                )
+
             return error_msg
 
+        finally:
+            activities.flush()
+
+    def _own_context(self) -> Dict[str, Any]:
+        """This agent's broadband context, re-fetched from the manager only once it has expired."""
+        context = self._ctx
+        if time.monotonic() - context["last_updated"] > self.broadband_context.context_timeout:
+            context = self._ctx = self.broadband_context.get_or_create_context(self.user_id)
+        return context
+
+    def _context_for(self, user_id: str) -> Dict[str, Any]:
+        """Broadband context for user_id, short-circuiting to the cached one for this agent's user."""
+        if user_id == self.user_id:
+            return self._own_context()
+        return self.broadband_context.get_or_create_context(user_id)
+
+    def _recent_memory_messages(self) -> List[Dict[str, Any]]:
+        """Role/content dicts for the messages inside the memory window (k exchanges)."""
+        if not self.memory:
+            return []
+        window = self.memory.chat_memory.messages[-2 * self.settings.conversation_memory_size:]
+        return [
+            {"role": _MESSAGE_ROLES[type(msg)], "content": msg.content}
+            for msg in window
+            if type(msg) in _MESSAGE_ROLES
+        ]
+
     async def get_memory(self) -> List[Dict[str, Any]]:
         """Get the current conversation memory."""
         try:
             if not self.memory:
                 return []
 
-            messages = self.memory.chat_memory.messages
-            memory_list = []
-            
-            for msg in messages:
-                if isinstance(msg, HumanMessage):
-                    memory_list.append({"role": "user", "content": msg.content})
-                elif isinstance(msg, AIMessage):
-                    memory_list.append({"role": "assistant", "content": msg.content})
-
-            return memory_list
+            return [
+                {"role": _MESSAGE_ROLES[type(msg)], "content": msg.content}
+                for msg in self.memory.chat_memory.messages
+                if type(msg) in _MESSAGE_ROLES
+            ]
 
         except Exception as e:
             logger.error(f"❌ Error getting memory for user {self.user_id}: {e}")
@@ -1041,6 +1430,7 @@ class LangChainTextAgent:
             # Optionally clear broadband-specific data
             if clear_broadband_context:
                 self.broadband_context.clear_context(self.user_id)
+                self._ctx = self.broadband_context.get_or_create_context(self.user_id)
                 self.broadband_cache.clear()
                 logger.info(f"🧹 Cleared conversation memory AND broadband context for user {self.user_id}")
             else:
@@ -1062,7 +1452,14 @@ class LangChainTextAgent:
         Returns:
             Dictionary containing broadband context
         """
-        return self.broadband_context.get_or_create_context(user_id)
+        context = self._context_for(user_id)
+        # search_history is a deque and last_updated is monotonic internally;
+        # hand out a copy with a plain list and a wall-clock datetime
+        return {
+            **context,
+            "search_history": list(context["search_history"]),
+            "last_updated": _wall_clock(context["last_updated"])
+        }
     
     def get_broadband_statistics(self, user_id: str) -> Dict[str, Any]:
         """
@@ -1074,15 +1471,16 @@ class LangChainTextAgent:
         Returns:
             Dictionary containing statistics
         """
-        context = self.broadband_context.get_or_create_context(user_id)
+        context = self._context_for(user_id)
+        query_count, confirmed_postcode, search_history, last_parameters, last_updated = _STATS_FIELDS(context)
         return {
-            "query_count": context.get("query_count", 0),
-            "has_confirmed_postcode": context.get("confirmed_postcode") is not None,
-            "confirmed_postcode": context.get("confirmed_postcode"),
-            "search_history_count": len(context.get("search_history", [])),
-            "has_parameters": bool(context.get("last_parameters")),
-            "last_updated": context.get("last_updated"),
-            "cache_size": len(self.broadband_cache.cache)
+            "query_count": query_count,
+            "has_confirmed_postcode": confirmed_postcode is not None,
+            "confirmed_postcode": confirmed_postcode,
+            "search_history_count": len(search_history),
+            "has_parameters": bool(last_parameters),
+            "last_updated": _wall_clock(last_updated),
+            "cache_size": len(self.broadband_cache)
         }
     
     def _generate_tool_guidance(self, tools: List[Any], current_page: str) -> str:
@@ -1097,169 +1495,15 @@ class LangChainTextAgent:
         Returns:
             Formatted guidance string
         """
-        guidance = f"""
-## 🔧 AVAILABLE TOOLS FOR CURRENT PAGE ({current_page}):
-
-You have access to {len(tools)} specialized tools for broadband comparison.
-
-### Tool Selection Rules:
-1. **For broadband operations**: Use `broadband_action` tool with appropriate action_type
-2. **Check the tool description** to see what actions are available
-
-### Available Tools:
-"""
-        for tool in tools:
-            tool_name = tool.name
-            tool_desc = tool.description
-            guidance += f"\n- **{tool_name}**: {tool_desc[:200]}..."
-        
-        guidance += f"""
-
-### Current Page Guidance:
-- You are currently on the **{current_page}** page
-- Use the **broadband_action** tool for all broadband comparison operations
-- Available actions include: query, generate_url, get_recommendations, compare_providers, get_cheapest, get_fastest, list_providers, open_url
-
-### Important:
-- Each tool has specific action_type enums - only use valid action types
-- Read the tool descriptions carefully to understand what actions are supported
-- If unsure, check the tool's description for the list of valid action types
-"""
+        parts = [_TOOL_GUIDANCE_HEADER.format(current_page=current_page, tool_count=len(tools))]
+        parts.extend(f"\n- **{lc_tool.name}**: {lc_tool.description[:200]}..." for lc_tool in tools)
+        parts.append(_TOOL_GUIDANCE_FOOTER.format(current_page=current_page))
         
         # Add broadband-specific guidance if on broadband page
         if current_page == "broadband":
-            guidance += """
-
-## 🌐 BROADBAND TOOL - SPECIAL GUIDANCE:
-
-### CONVERSATIONAL MODE - Build Requirements Piece by Piece:
-- **NEW**: Support for building broadband requirements incrementally
-- User can provide postcode first, then speed, then contract, etc.
-- **URLs auto-generate** when minimum parameters (postcode + speed) are available
-- **No scraping or recommendations until explicitly requested**
-- System remembers parameters across conversation turns
-
-### Automatic Postcode Validation:
-- Postcodes are AUTOMATICALLY validated with regex and matched against database using fuzzy search
-- The system AUTO-SELECTS the best match (100% match or highest score)
-- **NO USER CONFIRMATION NEEDED** - postcode selection happens in the background
-- Simply pass the postcode in your query - the tool handles validation and matching
-
-### Natural Language Processing:
-- The broadband tool has advanced AI parameter extraction
-- It understands queries like:
-  - "Find broadband in E14 9WB with 100Mb speed and 12 month contract"
-  - "Show me cheapest deals from BT and Sky"
-  - "I want superfast fibre with unlimited calls"
-  - "Compare Virgin Media and TalkTalk in Manchester"
-
-### CONVERSATIONAL PARAMETER HANDLING:
-- **action_type="query"** now supports BOTH natural language AND individual parameters
-- If you get individual parameters (postcode, speed_in_mb, etc.), treat as parameter updates
-- URLs will auto-generate when postcode + speed are available
-- Example conversational flow:
-  - User: "I need broadband in E14 9WB" → Tool updates postcode, no URL yet
-  - User: "100Mb speed please" → Tool updates speed, auto-generates URL
-  - User: "Change to 24 months" → Tool updates contract, regenerates URL
-
-### Action Types Available:
-1. **query** - Process natural language OR handle parameter updates
-   - Natural language: user_id="123", action_type="query", query="Find 100Mb broadband in SW1A 1AA"
-   - Parameter updates: user_id="123", action_type="query", postcode="E14 9WB", speed_in_mb="55Mb"
-   - Automatically extracts and updates parameters incrementally
-   - URLs auto-generate when sufficient parameters available
-
-2. **generate_url** - Generate comparison URL with explicit parameters
-   - Use when parameters are already known
-   - Example: user_id="123", action_type="generate_url", postcode="E149WB", speed_in_mb="100Mb"
-
-3. **get_recommendations** - Get AI-powered deal recommendations (only when requested)
-   - Analyzes scraped data and provides personalized suggestions
-   - Example: user_id="123", action_type="get_recommendations"
-
-4. **compare_providers** - Compare specific providers
-   - Example: user_id="123", action_type="compare_providers", providers="BT,Sky,Virgin Media"
-
-5. **get_cheapest** - Find cheapest available deal
-6. **get_fastest** - Find fastest available deal
-7. **list_providers** - Show all available providers
-8. **filter_data** - Apply filters to existing results
-9. **refine_search** - Refine search parameters
-
-### CONVERSATIONAL MEMORY:
-- System maintains broadband parameters across conversation turns
-- **Auto-fills** previously mentioned parameters
-- **Auto-generates URLs** when minimum requirements met
-- **Only scrapes/recommends** when explicitly asked
-
-### Example Usage Patterns:
-
-**CONVERSATIONAL FLOW (RECOMMENDED):**
-```
-User: "I need broadband in E14 9WB"
-Tool Call: broadband_action(
-  user_id="123",
-  action_type="query",
-  postcode="E14 9WB"
-)
-# Response: Parameters updated, waiting for more info
-
-User: "100Mb speed with Hyperoptic"
-Tool Call: broadband_action(
-  user_id="123",
-  action_type="query",
-  speed_in_mb="100Mb",
-  providers="Hyperoptic"
-)
-# Response: URL auto-generated with all parameters
-
-User: "Actually, change that to 24 months"
-Tool Call: broadband_action(
-  user_id="123",
-  action_type="query",
-  contract_length="24 months"
-)
-# Response: URL updated with new contract length
-```
-
-**Natural Language Query (still supported):**
-```
-User: "Find broadband deals in E14 9WB with 100Mb speed"
-Tool Call: broadband_action(
-  user_id="123",
-  action_type="query",
-  query="Find broadband deals in E14 9WB with 100Mb speed"
-)
-```
-
-**Explicit Actions (when intent is clear):**
-```
-User: "Show me recommendations"
-Tool Call: broadband_action(
-  user_id="123",
-  action_type="get_recommendations"
-)
-# Uses current parameters from conversation state
-
-User: "Compare BT and Virgin Media"
-Tool Call: broadband_action(
-  user_id="123",
-  action_type="compare_providers",
-  providers="BT,Virgin Media"
-)
-```
-
-### Best Practices:
-1. **CONVERSATIONAL FIRST**: Use individual parameters with action_type="query" to build requirements incrementally
-2. **AUTO-GENERATION**: URLs generate automatically when postcode + speed are available - no need to explicitly request
-3. **NATURAL FLOW**: Users can say "postcode first", then "speed", then "contract" - parameters accumulate naturally
-4. **Don't ask for postcode confirmation** - System auto-selects best match
-5. **Only scrape/recommend when asked** - URLs generate immediately, but data analysis only on request
-6. **Use specific action types** (get_recommendations, compare_providers, etc.) when user explicitly asks for analysis
-7. **Trust parameter accumulation** - System remembers and auto-fills previous parameters
-"""
+            parts.append(BROADBAND_GUIDANCE)
         
-        return guidance
+        return "".join(parts)
 
 
 # Mock implementations for when LangChain is not available
@@ -5,12 +5,11 @@ Handles voice pipeline setup, conversation management, and tool integration.
 Extracted from router.py for better code organization.
 """
 
-import os
 import sys
+import copy
 import time
 import asyncio
 from typing import Dict, Any, Optional
-from datetime import datetime
 from loguru import logger
 
 # Import Pipecat components
@@ -36,12 +35,43 @@ import websockets
 
 # Import internal modules
 from ..config.settings import get_settings
-from ..utils.validators import validate_page_name, validate_api_key
-from ..utils.langfuse_tracing import get_langfuse_tracer, log_api_call, setup_tracing
+from ..utils.validators import normalize_page_name, validate_page_name, validate_api_key
+from ..utils.langfuse_tracing import get_langfuse_tracer, log_api_call, ensure_tracing
+from ..utils.time_utils import fast_iso_now
 from .agent_manager import create_agent_manager
 from .conversation_manager import get_conversation_manager
 
 
+# Pristine Silero analyzers keyed on stop_secs; cloned per session so the ONNX
+# inference session is loaded once while VAD state stays per-stream.
+_VAD_ANALYZER_CACHE: Dict[float, SileroVADAnalyzer] = {}
+
+
+def get_vad_analyzer(stop_secs: float) -> SileroVADAnalyzer:
+    """
+    Get a Silero VAD analyzer for a new session.
+
+    The ONNX model is loaded once per stop_secs value. Each call returns a shallow
+    clone sharing the inference session but with its own buffers and model state.
+
+    Args:
+        stop_secs: Silence duration before the VAD reports end of speech
+
+    Returns:
+        SileroVADAnalyzer ready for a single audio stream
+    """
+    template = _VAD_ANALYZER_CACHE.get(stop_secs)
+    if template is None:
+        template = SileroVADAnalyzer(params=VADParams(stop_secs=stop_secs))
+        _VAD_ANALYZER_CACHE[stop_secs] = template
+        logger.info(f"✅ Loaded Silero VAD model (stop_secs={stop_secs})")
+
+    analyzer = copy.copy(template)
+    analyzer._model = copy.copy(template._model)
+    analyzer._model.reset_states()
+    return analyzer
+
+
 class VoiceAgent:
     """
     Voice-based conversational AI agent using Gemini Multimodal Live.
@@ -93,18 +123,11 @@ class VoiceAgent:
             self.current_page = normalized_page
         else:
             logger.warning(f"⚠️ Invalid page name, using: {self.current_page}")
-            self.current_page = self.current_page.lower().strip().replace(" ", "-").replace("_", "-")
-        
-        # Setup tracing
-        if self.settings.langfuse_enabled:
-            if self.settings.otel_exporter_otlp_endpoint:
-                os.environ["OTEL_EXPORTER_OTLP_ENDPOINT"] = self.settings.otel_exporter_otlp_endpoint
-                logger.info(f"✅ Set OTLP environment variables for Pipecat")
-            if self.settings.otel_exporter_otlp_headers:
-                os.environ["OTEL_EXPORTER_OTLP_HEADERS"] = self.settings.otel_exporter_otlp_headers
+            self.current_page = normalize_page_name(self.current_page)
         
+        # Setup tracing (provider and OTLP env vars are configured once per process)
         try:
-            setup_tracing(
+            ensure_tracing(
                 service_name=self.settings.otel_service_name,
                 settings=self.settings
             )
@@ -128,7 +151,7 @@ class VoiceAgent:
                 audio_in_enabled=True,
                 audio_out_enabled=True,
                 add_wav_header=False,
-                vad_analyzer=SileroVADAnalyzer(params=VADParams(stop_secs=self.settings.vad_stop_seconds)),
+                vad_analyzer=get_vad_analyzer(self.settings.vad_stop_seconds),
                 serializer=ProtobufFrameSerializer(),
             ),
         )
@@ -145,7 +168,7 @@ class VoiceAgent:
         context_aggregator = self.llm_service.create_context_aggregator(context)
         
         # Log system initialization
-        self.conversation_manager.log_activity_to_trace(
+        self.conversation_manager.buffer_activity(
             user_id=self.user_id,
             activity_type="system_initialization",
             data={
@@ -271,10 +294,12 @@ class VoiceAgent:
         @self.llm_service.event_handler("on_llm_response")
         async def on_llm_response(response):
             """Capture LLM responses for transcript logging."""
+            if not self.conversation_trace:
+                return
             llm_start_time = time.time()
             
             try:
-                logger.info(f"🤖 LLM Response received")
+                logger.debug("🤖 LLM Response received")
                 
                 transcript_text = None
                 response_text = None
@@ -287,48 +312,47 @@ class VoiceAgent:
                 # Check for content
                 if hasattr(response, 'content'):
                     response_text = response.content[:200] + "..." if len(response.content) > 200 else response.content
-                    logger.info(f"📝 LLM Response content: {response_text}")
+                    logger.debug("📝 LLM Response content: {}", response_text)
                 
                 llm_end_time = time.time()
                 llm_duration = llm_end_time - llm_start_time
                 
                 # Log to Langfuse
-                if self.conversation_trace:
-                    try:
-                        update_data = {"user_id": self.user_id}
-                        update_metadata = {"response_source": "llm", "user_id": self.user_id}
+                try:
+                    update_data = {"user_id": self.user_id}
+                    update_metadata = {"response_source": "llm", "user_id": self.user_id}
                         
-                        if transcript_text:
-                            update_data["transcript"] = transcript_text
-                            update_metadata["transcript_source"] = "llm_response_metadata"
+                    if transcript_text:
+                        update_data["transcript"] = transcript_text
+                        update_metadata["transcript_source"] = "llm_response_metadata"
                         
-                        if response_text:
-                            update_data["ai_response"] = response_text
-                            update_metadata["response_length"] = len(response_text)
+                    if response_text:
+                        update_data["ai_response"] = response_text
+                        update_metadata["response_length"] = len(response_text)
                         
-                        update_metadata.update({
-                            "llm_duration_seconds": llm_duration,
-                            "llm_processing_time": llm_end_time,
-                            "llm_start_time": llm_start_time
-                        })
+                    update_metadata.update({
+                        "llm_duration_seconds": llm_duration,
+                        "llm_processing_time": llm_end_time,
+                        "llm_start_time": llm_start_time
+                    })
                         
-                        self.conversation_manager.log_activity_to_trace(
-                            user_id=self.user_id,
-                            activity_type="llm_response",
-                            data={
-                                **update_data,
-                                **update_metadata,
-                                "session_id": self.conversation_session.session_id
-                            }
-                        )
+                    self.conversation_manager.buffer_activity(
+                        user_id=self.user_id,
+                        activity_type="llm_response",
+                        data={
+                            **update_data,
+                            **update_metadata,
+                            "session_id": self.conversation_session.session_id
+                        }
+                    )
                         
-                        if transcript_text:
-                            logger.info(f"🔍 Logged transcript to Langfuse (duration: {llm_duration:.3f}s)")
-                        if response_text:
-                            logger.info(f"🔍 Logged AI response to Langfuse (duration: {llm_duration:.3f}s)")
+                    if transcript_text:
+                        logger.debug("🔍 Logged transcript to Langfuse (duration: {:.3f}s)", llm_duration)
+                    if response_text:
+                        logger.debug("🔍 Logged AI response to Langfuse (duration: {:.3f}s)", llm_duration)
                     
-                    except Exception as e:
-                        logger.warning(f"⚠️ Failed to log LLM response to Langfuse: {e}")
+                except Exception as e:
+                    logger.warning(f"⚠️ Failed to log LLM response to Langfuse: {e}")
             
             except Exception as e:
                 logger.warning(f"⚠️ Failed to handle LLM response: {e}")
@@ -339,17 +363,17 @@ class VoiceAgent:
             llm_tool_call_start_time = time.time()
             
             try:
-                logger.info(f"🔧 Function call received: {type(function_call)}")
+                logger.debug("🔧 Function call received: {}", type(function_call))
                 
                 if hasattr(function_call, 'name'):
-                    logger.info(f"📝 Function name: {function_call.name}")
+                    logger.debug("📝 Function name: {}", function_call.name)
                     if hasattr(function_call, 'arguments'):
-                        logger.info(f"📝 Function arguments: {function_call.arguments}")
+                        logger.debug("📝 Function arguments: {}", function_call.arguments)
                     
                     llm_tool_call_end_time = time.time()
                     llm_tool_call_duration = llm_tool_call_end_time - llm_tool_call_start_time
                     
-                    self.conversation_manager.log_activity_to_trace(
+                    self.conversation_manager.buffer_activity(
                         user_id=self.user_id,
                         activity_type="llm_function_call",
                         data={
@@ -359,7 +383,7 @@ class VoiceAgent:
                             "source": "voice_llm"
                         }
                     )
-                    logger.info(f"🔍 Logged function call to unified trace (duration: {llm_tool_call_duration:.3f}s)")
+                    logger.debug("🔍 Logged function call to unified trace (duration: {:.3f}s)", llm_tool_call_duration)
             
             except Exception as e:
                 logger.warning(f"⚠️ Failed to handle function call: {e}")
@@ -370,44 +394,43 @@ class VoiceAgent:
         @transcript.event_handler("on_transcript_update")
         async def on_transcript_update(processor, frame):
             """Handle STT transcript data."""
+            if not self.conversation_trace:
+                return
             stt_start_time = time.time()
             
             try:
-                logger.info(f"🎤 Received transcript update")
+                logger.debug("🎤 Received transcript update")
                 
-                if hasattr(self.agent_manager, 'conversation_trace') and self.agent_manager.conversation_trace:
-                    if hasattr(frame, 'messages') and frame.messages:
-                        logger.info(f"📝 Found {len(frame.messages)} messages in frame")
-                        for i, message in enumerate(frame.messages):
-                            if message.role == "user" and message.content.strip():
-                                transcript_text = message.content.strip()
-                                stt_end_time = time.time()
-                                stt_duration = stt_end_time - stt_start_time
+                if hasattr(frame, 'messages') and frame.messages:
+                    logger.debug("📝 Found {} messages in frame", len(frame.messages))
+                    for i, message in enumerate(frame.messages):
+                        if message.role == "user" and message.content.strip():
+                            transcript_text = message.content.strip()
+                            stt_end_time = time.time()
+                            stt_duration = stt_end_time - stt_start_time
                                 
-                                try:
-                                    self.conversation_manager.log_activity_to_trace(
-                                        user_id=self.user_id,
-                                        activity_type="input",
-                                        data={
-                                            "transcript": transcript_text,
-                                            "source": "stt",
-                                            "processor": type(processor).__name__,
-                                            "message_role": message.role,
-                                            "content_length": len(transcript_text),
-                                            "session_id": self.conversation_session.session_id,
-                                            "is_final": True,
-                                            "language": "en-US",
-                                            "stt_duration_seconds": stt_duration
-                                        }
-                                    )
-                                    logger.info(f"🔍 Updated unified trace with STT input (duration: {stt_duration:.3f}s)")
+                            try:
+                                self.conversation_manager.buffer_activity(
+                                    user_id=self.user_id,
+                                    activity_type="input",
+                                    data={
+                                        "transcript": transcript_text,
+                                        "source": "stt",
+                                        "processor": type(processor).__name__,
+                                        "message_role": message.role,
+                                        "content_length": len(transcript_text),
+                                        "session_id": self.conversation_session.session_id,
+                                        "is_final": True,
+                                        "language": "en-US",
+                                        "stt_duration_seconds": stt_duration
+                                    }
+                                )
+                                logger.debug("🔍 Updated unified trace with STT input (duration: {:.3f}s)", stt_duration)
                                 
-                                except Exception as e:
-                                    logger.warning(f"⚠️ Failed to update STT input in unified trace: {e}")
-                    else:
-                        logger.warning(f"⚠️ Frame has no messages")
+                            except Exception as e:
+                                logger.warning(f"⚠️ Failed to update STT input in unified trace: {e}")
                 else:
-                    logger.warning("⚠️ No conversation trace available")
+                    logger.warning("⚠️ Frame has no messages")
             
             except Exception as e:
                 logger.warning(f"⚠️ Failed to handle transcript event: {e}")
@@ -449,7 +472,7 @@ class VoiceAgent:
                     tool_response_data = {"raw_result": str(result)}
                 
                 # Log function call activity
-                self.conversation_manager.log_activity_to_trace(
+                self.conversation_manager.buffer_activity(
                     user_id=self.user_id,
                     activity_type="tool_function_call",
                     data={
@@ -463,7 +486,7 @@ class VoiceAgent:
                 )
                 
                 # Log tool response
-                self.conversation_manager.log_activity_to_trace(
+                self.conversation_manager.buffer_activity(
                     user_id=self.user_id,
                     activity_type="tool_response",
                     data={
@@ -475,21 +498,22 @@ class VoiceAgent:
                         "tool_execution_duration_seconds": tool_execution_duration,
                         "success": True,
                         "source": "voice",
-                        "timestamp": datetime.now().isoformat()
+                        "timestamp": fast_iso_now()
                     }
                 )
                 
-                log_api_call(
-                    tool_name=params.function_name,
-                    action="execute",
-                    parameters=params.arguments,
-                    result=result,
-                    duration=duration,
-                    success=True,
-                    trace_id=self.conversation_trace,
-                    user_id=self.user_id,
-                    session_id=self.session_id
-                )
+                if self.conversation_manager.is_session_sampled(self.user_id):
+                    log_api_call(
+                        tool_name=params.function_name,
+                        action="execute",
+                        parameters=params.arguments,
+                        result=result,
+                        duration=duration,
+                        success=True,
+                        trace_id=self.conversation_trace,
+                        user_id=self.user_id,
+                        session_id=self.session_id
+                    )
                 
                 await params.result_callback({"result": result})
             
@@ -499,6 +523,9 @@ class VoiceAgent:
                 
                 logger.error(f"❌ Function call error: {e}")
                 
+                # Export buffered context ahead of the error
+                self.conversation_manager.flush_activity_buffer(self.user_id)
+                
                 # Log error
                 self.conversation_manager.log_activity_to_trace(
                     user_id=self.user_id,
@@ -557,12 +584,17 @@ class VoiceAgent:
         try:
             await self.runner.run(self.task)
             
+            # Clean run: routine activity is not exported
+            self.conversation_manager.discard_activity_buffer(self.user_id)
+            
             # Update conversation session
             self.conversation_manager.update_session_activity(self.user_id, conversation_type="voice")
             logger.info(f"✅ Voice conversation completed for user {self.user_id}")
         
         except websockets.exceptions.ConnectionClosedError as e:
             logger.warning(f"⚠️ WebSocket connection closed: {e}")
+            # Expected when the user disconnects, so don't export buffered activity
+            self.conversation_manager.discard_activity_buffer(self.user_id)
             
             # Log connection closure
             self.conversation_manager.log_activity_to_trace(
@@ -578,6 +610,7 @@ class VoiceAgent:
         
         except Exception as e:
             logger.error(f"❌ Pipeline error: {e}")
+            self.conversation_manager.flush_activity_buffer(self.user_id)
             
             # Log error
             self.conversation_manager.log_activity_to_trace(
@@ -4,116 +4,155 @@ Enhanced WebSocket registry for agent voice backend.
 Supports multiple users simultaneously with improved error handling and monitoring.
 """
 
-from typing import Dict, Optional
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Set
 from fastapi import WebSocket
 import asyncio
-from datetime import datetime
+import time
+import warnings
+import orjson
 from loguru import logger
 
 
+def _dumps(data: Any) -> str:
+    """
+    Serialize a message for a tool websocket text frame.
+
+    Clients JSON.parse(event.data), so messages go out as text, not bytes.
+    OPT_NON_STR_KEYS keeps json.dumps' handling of int/enum dict keys.
+    """
+    return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+async def _ping(websocket: WebSocket) -> None:
+    """Ping one websocket; wrapped so any failure (even a missing ping()) lands in gather's results."""
+    await websocket.ping()
+
+
+@dataclass(slots=True)
+class ToolConnection:
+    """A user's registered tool websocket."""
+    websocket: WebSocket
+    connected_at: float  # time.monotonic()
+    last_ping: float  # time.monotonic()
+
+
+@dataclass(slots=True)
+class ProductInfoConnection:
+    """A user's registered product info websocket client."""
+    websocket: WebSocket
+    connected_at: float  # time.monotonic()
+    last_message: Optional[str] = None
+
+
 class WebSocketRegistry:
     """Enhanced WebSocket registry with connection monitoring."""
     
     def __init__(self):
         # User-specific store for tool WebSocket connections
-        # Structure: {user_id: {"websocket": websocket, "connected_at": datetime, "last_ping": datetime}}
-        self.user_tool_websockets: Dict[str, Dict] = {}
+        self.user_tool_websockets: Dict[str, ToolConnection] = {}
         
-        # User-specific registry for product info websocket clients  
-        # Structure: {user_id: {"websocket": websocket, "last_message": str, "connected_at": datetime}}
-        self.user_product_info_clients: Dict[str, Dict] = {}
+        # User-specific registry for product info websocket clients
+        self.user_product_info_clients: Dict[str, ProductInfoConnection] = {}
         
         # Session management for user tracking
-        # Structure: {session_id: {"user_id": user_id, "connected_at": datetime}}
+        # Structure: {session_id: {"user_id": user_id, "connected_at": time.monotonic()}}
         self.session_user_mapping: Dict[str, Dict] = {}
+        
+        # Bare websocket per user, kept in step with the dicts above for one-lookup sends
+        self._tool_ws: Dict[str, WebSocket] = {}
+        self._product_ws: Dict[str, WebSocket] = {}
+        
+        # Strong references to in-flight close() tasks so they are not GC'd mid-flight
+        self._closing_tasks: Set[asyncio.Task] = set()
+    
+    def _close_in_background(self, websocket: WebSocket, reason: str) -> None:
+        """Schedule websocket.close() and keep the task alive until it finishes."""
+        task = asyncio.create_task(websocket.close(code=1000, reason=reason))
+        self._closing_tasks.add(task)
+        task.add_done_callback(self._closing_tasks.discard)
     
     def register_tool_websocket(self, user_id: str, websocket: WebSocket) -> None:
         """Register a tool websocket for a specific user."""
         # Close existing connection if any
-        if user_id in self.user_tool_websockets:
-            existing_data = self.user_tool_websockets[user_id]
-            existing_ws = existing_data.get("websocket")
+        existing = self.user_tool_websockets.get(user_id)
+        if existing is not None:
+            existing_ws = existing.websocket
             if existing_ws:
                 try:
-                    asyncio.create_task(existing_ws.close(code=1000, reason="New connection"))
+                    self._close_in_background(existing_ws, "New connection")
                     logger.info(f"🔄 Closed existing tool WebSocket for user: {user_id}")
                 except Exception:
                     logger.warning(f"⚠️ Could not close existing tool WebSocket for user: {user_id}")
         
-        self.user_tool_websockets[user_id] = {
-            "websocket": websocket,
-            "connected_at": datetime.now(),
-            "last_ping": datetime.now()
-        }
-        logger.info(f"🔧 Registered tool websocket for user: {user_id}")
-        logger.info(f"🔧 Total tool websockets: {len(self.user_tool_websockets)}")
+        now = time.monotonic()
+        self.user_tool_websockets[user_id] = ToolConnection(websocket, now, now)
+        self._tool_ws[user_id] = websocket
+        logger.info("🔧 Registered tool websocket for user: {} (total={})", user_id, len(self.user_tool_websockets))
 
     def unregister_tool_websocket(self, user_id: str) -> None:
         """Unregister a tool websocket for a specific user."""
         if user_id in self.user_tool_websockets:
             del self.user_tool_websockets[user_id]
-            logger.info(f"🧹 Unregistered tool websocket for user: {user_id}")
-            logger.info(f"🔧 Remaining tool websockets: {len(self.user_tool_websockets)}")
+            self._tool_ws.pop(user_id, None)
+            logger.info("🧹 Unregistered tool websocket for user: {} (remaining={})", user_id, len(self.user_tool_websockets))
 
     def get_tool_websocket(self, user_id: str) -> Optional[WebSocket]:
         """Get the tool websocket for a specific user."""
-        data = self.user_tool_websockets.get(user_id)
-        return data.get("websocket") if data else None
+        return self._tool_ws.get(user_id)
     
-    def get_tool_websocket_info(self, user_id: str) -> Optional[Dict]:
+    def get_tool_websocket_info(self, user_id: str) -> Optional[ToolConnection]:
         """Get tool websocket connection info for a specific user."""
         return self.user_tool_websockets.get(user_id)
 
     def register_product_info_client(self, user_id: str, websocket: WebSocket) -> None:
         """Register a product info websocket client for a specific user."""
         # Close existing connection if any
-        if user_id in self.user_product_info_clients:
-            existing_data = self.user_product_info_clients[user_id]
-            existing_ws = existing_data.get("websocket")
+        existing = self.user_product_info_clients.get(user_id)
+        if existing is not None:
+            existing_ws = existing.websocket
             if existing_ws:
                 try:
-                    asyncio.create_task(existing_ws.close(code=1000, reason="New client connection"))
+                    self._close_in_background(existing_ws, "New client connection")
                     logger.info(f"🔄 Closed existing product info connection for user: {user_id}")
                 except Exception:
                     logger.warning(f"⚠️ Could not close existing connection for user: {user_id}")
         
-        self.user_product_info_clients[user_id] = {
-            "websocket": websocket,
-            "last_message": None,
-            "connected_at": datetime.now()
-        }
-        logger.info(f"🔗 Registered product info client for user: {user_id}")
-        logger.info(f"🔗 Total product info clients: {len(self.user_product_info_clients)}")
+        self.user_product_info_clients[user_id] = ProductInfoConnection(websocket, time.monotonic())
+        self._product_ws[user_id] = websocket
+        logger.info("🔗 Registered product info client for user: {} (total={})", user_id, len(self.user_product_info_clients))
 
     def unregister_product_info_client(self, user_id: str) -> None:
         """Unregister a product info websocket client for a specific user."""
         if user_id in self.user_product_info_clients:
             del self.user_product_info_clients[user_id]
-            logger.info(f"🧹 Unregistered product info client for user: {user_id}")
+            self._product_ws.pop(user_id, None)
+            logger.info("🧹 Unregistered product info client for user: {} (remaining={})", user_id, len(self.user_product_info_clients))
 
-    def get_product_info_client(self, user_id: str) -> Optional[Dict]:
+    def get_product_info_client(self, user_id: str) -> Optional[ProductInfoConnection]:
         """Get the product info client data for a specific user."""
         return self.user_product_info_clients.get(user_id)
 
     def set_product_info_last_message(self, user_id: str, message: str) -> None:
         """Set the last message for a specific user's product info client."""
-        if user_id in self.user_product_info_clients:
-            self.user_product_info_clients[user_id]["last_message"] = message
+        client = self.user_product_info_clients.get(user_id)
+        if client is not None:
+            client.last_message = message
 
     def register_session_user(self, session_id: str, user_id: str) -> None:
         """Register a session with a user ID."""
         self.session_user_mapping[session_id] = {
             "user_id": user_id,
-            "connected_at": datetime.now()
+            "connected_at": time.monotonic()
         }
-        logger.info(f"🆔 Registered session {session_id} for user: {user_id}")
+        logger.info("🆔 Registered session {} for user: {} (total={})", session_id, user_id, len(self.session_user_mapping))
 
     def unregister_session_user(self, session_id: str) -> None:
         """Unregister a session."""
         if session_id in self.session_user_mapping:
             user_id = self.session_user_mapping[session_id]["user_id"]
             del self.session_user_mapping[session_id]
-            logger.info(f"🧹 Unregistered session {session_id} for user: {user_id}")
+            logger.info("🧹 Unregistered session {} for user: {}", session_id, user_id)
 
     def get_user_from_session(self, session_id: str) -> Optional[str]:
         """Get the user ID from a session ID."""
@@ -126,14 +165,18 @@ class WebSocketRegistry:
 
     def get_all_users(self) -> list:
         """Get all active user IDs."""
-        # Get users from all sources: sessions, tool websockets, and product info clients
-        session_users = [data["user_id"] for data in self.session_user_mapping.values()]
-        tool_users = list(self.user_tool_websockets.keys())
-        product_info_users = list(self.user_product_info_clients.keys())
-        
-        all_users = list(set(session_users + tool_users + product_info_users))
-        logger.debug(f"[Registry] All users - Sessions: {session_users}, Tools: {tool_users}, ProductInfo: {product_info_users}, Combined: {all_users}")
-        return all_users
+        # Get users from all sources: tool websockets, product info clients, and sessions
+        users = set(self.user_tool_websockets)
+        users.update(self.user_product_info_clients)
+        users.update(data["user_id"] for data in self.session_user_mapping.values())
+        logger.opt(lazy=True).debug(
+            "[Registry] All users - Tools: {}, ProductInfo: {}, Sessions: {}, Combined: {}",
+            lambda: len(self.user_tool_websockets),
+            lambda: len(self.user_product_info_clients),
+            lambda: len(self.session_user_mapping),
+            lambda: len(users)
+        )
+        return list(users)
     
     def get_active_connections_count(self) -> Dict[str, int]:
         """Get count of active connections by type."""
@@ -144,37 +187,44 @@ class WebSocketRegistry:
         }
     
     async def ping_all_connections(self) -> Dict[str, int]:
-        """Ping all active connections to check health."""
+        """Ping all active connections concurrently to check health."""
+        tool_items = tuple(self.user_tool_websockets.items())
+        product_items = tuple(self.user_product_info_clients.items())
+        
+        # Ping every connection at once so the check takes one round trip, not N
+        results = await asyncio.gather(
+            *(_ping(conn.websocket) for _, conn in tool_items),
+            *(_ping(conn.websocket) for _, conn in product_items),
+            return_exceptions=True
+        )
+        tool_results = results[:len(tool_items)]
+        product_results = results[len(tool_items):]
+        
+        now = time.monotonic()
         tool_active = 0
         tool_failed = []
         
-        for user_id, data in list(self.user_tool_websockets.items()):
-            websocket = data["websocket"]
-            try:
-                await websocket.ping()
-                data["last_ping"] = datetime.now()
-                tool_active += 1
-            except Exception as e:
-                logger.warning(f"⚠️ Tool WebSocket ping failed for user {user_id}: {e}")
+        for (user_id, conn), result in zip(tool_items, tool_results):
+            if isinstance(result, Exception):
+                logger.warning(f"⚠️ Tool WebSocket ping failed for user {user_id}: {result}")
                 tool_failed.append(user_id)
-        
-        # Remove failed connections
-        for user_id in tool_failed:
-            self.unregister_tool_websocket(user_id)
+            else:
+                conn.last_ping = now
+                tool_active += 1
         
         product_active = 0
         product_failed = []
         
-        for user_id, data in list(self.user_product_info_clients.items()):
-            websocket = data["websocket"]
-            try:
-                await websocket.ping()
-                product_active += 1
-            except Exception as e:
-                logger.warning(f"⚠️ Product info WebSocket ping failed for user {user_id}: {e}")
+        for (user_id, _), result in zip(product_items, product_results):
+            if isinstance(result, Exception):
+                logger.warning(f"⚠️ Product info WebSocket ping failed for user {user_id}: {result}")
                 product_failed.append(user_id)
+            else:
+                product_active += 1
         
         # Remove failed connections
+        for user_id in tool_failed:
+            self.unregister_tool_websocket(user_id)
         for user_id in product_failed:
             self.unregister_product_info_client(user_id)
         
@@ -187,11 +237,10 @@ class WebSocketRegistry:
 
     async def send_to_user_tool_websocket(self, user_id: str, data: dict) -> bool:
         """Send data to a specific user's tool websocket."""
-        websocket_data = self.user_tool_websockets.get(user_id)
-        if websocket_data:
-            websocket = websocket_data["websocket"]
+        websocket = self._tool_ws.get(user_id)
+        if websocket is not None:
             try:
-                await websocket.send_json(data)
+                await websocket.send_text(_dumps(data))
                 logger.info(f"✅ Sent data to user {user_id} tool websocket")
                 return True
             except Exception as e:
@@ -204,9 +253,8 @@ class WebSocketRegistry:
 
     async def send_to_user_product_info(self, user_id: str, message: str) -> bool:
         """Send message to a specific user's product info websocket."""
-        client_data = self.user_product_info_clients.get(user_id)
-        if client_data:
-            websocket = client_data["websocket"]
+        websocket = self._product_ws.get(user_id)
+        if websocket is not None:
             try:
                 await websocket.send_text(message)
                 self.set_product_info_last_message(user_id, message)
@@ -222,21 +270,28 @@ class WebSocketRegistry:
 
     async def broadcast_to_all_tool_websockets(self, data: dict, exclude_users: list = None) -> int:
         """Broadcast data to all tool websockets except excluded users."""
-        exclude_users = exclude_users or []
+        excluded = set(exclude_users) if exclude_users else set()
+        
+        # Serialize once for every recipient
+        payload = _dumps(data)
+        
+        targets = [(user_id, websocket) for user_id, websocket in self._tool_ws.items()
+                   if user_id not in excluded]
+        
+        # Send to everyone at once so one slow client does not hold up the rest
+        results = await asyncio.gather(
+            *(websocket.send_text(payload) for _, websocket in targets),
+            return_exceptions=True
+        )
+        
         sent_count = 0
         failed_users = []
-        
-        for user_id, websocket_data in list(self.user_tool_websockets.items()):
-            if user_id in exclude_users:
-                continue
-                
-            websocket = websocket_data["websocket"]
-            try:
-                await websocket.send_json(data)
-                sent_count += 1
-            except Exception as e:
-                logger.error(f"❌ Failed to broadcast to user {user_id}: {e}")
+        for (user_id, _), result in zip(targets, results):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Failed to broadcast to user {user_id}: {result}")
                 failed_users.append(user_id)
+            else:
+                sent_count += 1
         
         # Remove failed connections
         for user_id in failed_users:
@@ -246,85 +301,47 @@ class WebSocketRegistry:
         return sent_count
 
 
-# Global registry instance
-_registry_instance = None
+# Global registry instance, created at import so lookups never take a lazy-init branch
+_registry_instance = WebSocketRegistry()
 
 
 def get_registry() -> WebSocketRegistry:
     """Get the global WebSocket registry instance."""
-    global _registry_instance
-    if _registry_instance is None:
-        _registry_instance = WebSocketRegistry()
     return _registry_instance
 
 
-# Convenience functions for backward compatibility
-def register_tool_websocket(user_id: str, websocket: WebSocket) -> None:
-    """Register a tool websocket for a specific user."""
-    get_registry().register_tool_websocket(user_id, websocket)
-
-
-def unregister_tool_websocket(user_id: str) -> None:
-    """Unregister a tool websocket for a specific user."""
-    get_registry().unregister_tool_websocket(user_id)
-
-
-def get_tool_websocket(user_id: str) -> Optional[WebSocket]:
-    """Get the tool websocket for a specific user."""
-    return get_registry().get_tool_websocket(user_id)
-
-
-def register_product_info_client(user_id: str, websocket: WebSocket) -> None:
-    """Register a product info websocket client for a specific user."""
-    get_registry().register_product_info_client(user_id, websocket)
-
-
-def unregister_product_info_client(user_id: str) -> None:
-    """Unregister a product info websocket client for a specific user."""
-    get_registry().unregister_product_info_client(user_id)
-
-
-def get_product_info_client(user_id: str) -> Optional[Dict]:
-    """Get the product info client data for a specific user."""
-    return get_registry().get_product_info_client(user_id)
-
-
-def set_product_info_last_message(user_id: str, message: str) -> None:
-    """Set the last message for a specific user's product info client."""
-    get_registry().set_product_info_last_message(user_id, message)
-
-
-def register_session_user(session_id: str, user_id: str) -> None:
-    """Register a session with a user ID."""
-    get_registry().register_session_user(session_id, user_id)
-
-
-def unregister_session_user(session_id: str) -> None:
-    """Unregister a session."""
-    get_registry().unregister_session_user(session_id)
-
-
-def get_user_from_session(session_id: str) -> Optional[str]:
-    """Get the user ID from a session ID."""
-    return get_registry().get_user_from_session(session_id)
-
-
-def get_all_users() -> list:
-    """Get all active user IDs."""
-    return get_registry().get_all_users()
-
-
-async def send_to_user_tool_websocket(user_id: str, data: dict) -> bool:
-    """Send data to a specific user's tool websocket."""
-    return await get_registry().send_to_user_tool_websocket(user_id, data)
-
-
-async def send_to_user_product_info(user_id: str, message: str) -> bool:
-    """Send message to a specific user's product info websocket."""
-    return await get_registry().send_to_user_product_info(user_id, message)
+# Convenience aliases for backward compatibility, bound directly to the global registry
+register_tool_websocket = _registry_instance.register_tool_websocket
+unregister_tool_websocket = _registry_instance.unregister_tool_websocket
+get_tool_websocket = _registry_instance.get_tool_websocket
+register_product_info_client = _registry_instance.register_product_info_client
+unregister_product_info_client = _registry_instance.unregister_product_info_client
+get_product_info_client = _registry_instance.get_product_info_client
+set_product_info_last_message = _registry_instance.set_product_info_last_message
+register_session_user = _registry_instance.register_session_user
+unregister_session_user = _registry_instance.unregister_session_user
+get_user_from_session = _registry_instance.get_user_from_session
+get_all_users = _registry_instance.get_all_users
+send_to_user_tool_websocket = _registry_instance.send_to_user_tool_websocket
+send_to_user_product_info = _registry_instance.send_to_user_product_info
 
 
 # Backward compatibility (deprecated - will be removed)
-user_tool_websockets = {}  # This will be empty, use get_registry().user_tool_websockets instead
-tool_websockets = user_tool_websockets  # For backward compatibility
-product_info_ws_client = {"websocket": None}  # For backward compatibility
\ No newline at end of file
+_legacy_user_tool_websockets: Dict[str, Dict] = {}  # Always empty, use get_registry().user_tool_websockets instead
+_DEPRECATED_GLOBALS = {
+    "user_tool_websockets": _legacy_user_tool_websockets,
+    "tool_websockets": _legacy_user_tool_websockets,
+    "product_info_ws_client": {"websocket": None},
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Serve the deprecated module globals with a DeprecationWarning."""
+    if name in _DEPRECATED_GLOBALS:
+        warnings.warn(
+            f"websocket_registry.{name} is deprecated and always empty; use get_registry() instead",
+            DeprecationWarning,
+            stacklevel=2
+        )
+        return _DEPRECATED_GLOBALS[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
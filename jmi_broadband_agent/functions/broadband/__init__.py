@@ -16,7 +16,11 @@ from .helpers import (
     validate_uk_postcode_format,
     format_currency,
     parse_currency,
-    extract_numeric_speed
+    extract_numeric_speed,
+    parse_monthly_cost,
+    deal_monthly_cost,
+    deal_speed_mb,
+    get_scraped_data
 )
 
 # Classes and their factory functions
@@ -82,6 +86,10 @@ __all__ = [
     'format_currency',
     'parse_currency',
     'extract_numeric_speed',
+    'parse_monthly_cost',
+    'deal_monthly_cost',
+    'deal_speed_mb',
+    'get_scraped_data',
     
     # Classes and factories
     'ParameterExtractor',
@@ -6,6 +6,17 @@ Provides functions for comparing providers, finding cheapest and fastest deals.
 from typing import Dict, List, Any, Optional
 from loguru import logger
 
+from .helpers import deal_monthly_cost, deal_speed_mb, get_scraped_data
+
+
+def _scraped_data_error(data: Dict) -> Optional[str]:
+    """Error message for scraped data that holds a scraping error, else None."""
+    if 'error' not in data:
+        return None
+    if 'Browser scraping not available' in data.get('error', ''):
+        return "❌ Data scraping is currently limited in this environment. Please use the generated URL to view deals directly."
+    return f"❌ Unable to fetch broadband data: {data.get('error', 'Unknown error')}"
+
 
 async def handle_compare_providers(
     user_id: str,
@@ -46,7 +57,8 @@ async def handle_compare_providers(
         provider_list = [p.strip() for p in providers.split(',')]
         
         # Check if we have scraped data
-        if not conversation_state or user_id not in conversation_state or 'scraped_data' not in conversation_state[user_id]:
+        data = get_scraped_data(conversation_state, user_id)
+        if data is None:
             # Auto-scrape data if not available
             if scrape_data_fn:
                 postcode = postcode or 'E14 9WB'
@@ -66,10 +78,10 @@ async def handle_compare_providers(
                 # If scraping returned an error message, return it
                 if scrape_result and isinstance(scrape_result, str) and scrape_result.startswith("❌"):
                     return scrape_result
+                data = get_scraped_data(conversation_state, user_id)
             else:
                 return "❌ Unable to fetch broadband data. Please scrape data first."
         
-        data = conversation_state[user_id]['scraped_data']
         if not data or 'error' in data or data.get('total_deals', 0) == 0:
             if data and 'error' in data and 'Browser scraping not available' in data.get('error', ''):
                 return "❌ Data scraping is currently limited in this environment. Please use the generated URL to view deals directly."
@@ -78,8 +90,9 @@ async def handle_compare_providers(
         
         deals = data.get('deals', [])
         
-        # Filter deals by providers
-        matching_deals = [deal for deal in deals if deal['provider']['name'] in provider_list]
+        # Filter deals by providers (provider_list keeps the requested order for output)
+        provider_set = frozenset(provider_list)
+        matching_deals = [deal for deal in deals if deal['provider']['name'] in provider_set]
         
         if not matching_deals:
             return f"❌ No deals found for providers: {', '.join(provider_list)}"
@@ -157,7 +170,8 @@ async def handle_get_cheapest(
     """
     try:
         # Check if we have scraped data
-        if not conversation_state or user_id not in conversation_state or 'scraped_data' not in conversation_state[user_id]:
+        data = get_scraped_data(conversation_state, user_id)
+        if data is None:
             # Scrape data if not available
             if scrape_data_fn:
                 postcode = postcode or 'E14 9WB'
@@ -177,29 +191,24 @@ async def handle_get_cheapest(
                 # If scraping returned an error message, return it
                 if scrape_result and isinstance(scrape_result, str) and scrape_result.startswith("❌"):
                     return scrape_result
+                data = get_scraped_data(conversation_state, user_id)
             else:
                 return "❌ Unable to fetch broadband data. Please scrape data first."
         
-        if not conversation_state or user_id not in conversation_state or 'scraped_data' not in conversation_state[user_id]:
+        if data is None:
             return "❌ Unable to fetch broadband data at this time."
         
-        data = conversation_state[user_id]['scraped_data']
-        if 'error' in data:
-            if 'Browser scraping not available' in data.get('error', ''):
-                return "❌ Data scraping is currently limited in this environment. Please use the generated URL to view deals directly."
-            else:
-                return f"❌ Unable to fetch broadband data: {data.get('error', 'Unknown error')}"
+        error_message = _scraped_data_error(data)
+        if error_message:
+            return error_message
         
         deals = data.get('deals', [])
         
         if not deals:
             return "❌ No deals available to find cheapest option."
         
-        # Sort by monthly cost
-        sorted_deals = sorted(deals,
-                            key=lambda x: float(x['pricing']['monthly_cost'].replace('£', '').replace(',', '')))
-        
-        cheapest = sorted_deals[0]
+        # Lowest monthly cost (first one wins on ties)
+        cheapest = min(deals, key=deal_monthly_cost)
         
         # Create structured output
         if send_websocket_fn and create_output_fn:
@@ -272,7 +281,8 @@ async def handle_get_fastest(
     """
     try:
         # Check if we have scraped data
-        if not conversation_state or user_id not in conversation_state or 'scraped_data' not in conversation_state[user_id]:
+        data = get_scraped_data(conversation_state, user_id)
+        if data is None:
             # Scrape data if not available
             if scrape_data_fn:
                 postcode = postcode or 'E14 9WB'
@@ -292,30 +302,24 @@ async def handle_get_fastest(
                 # If scraping returned an error message, return it
                 if scrape_result and isinstance(scrape_result, str) and scrape_result.startswith("❌"):
                     return scrape_result
+                data = get_scraped_data(conversation_state, user_id)
             else:
                 return "❌ Unable to fetch broadband data. Please scrape data first."
         
-        if not conversation_state or user_id not in conversation_state or 'scraped_data' not in conversation_state[user_id]:
+        if data is None:
             return "❌ Unable to fetch broadband data at this time."
         
-        data = conversation_state[user_id]['scraped_data']
-        if 'error' in data:
-            if 'Browser scraping not available' in data.get('error', ''):
-                return "❌ Data scraping is currently limited in this environment. Please use the generated URL to view deals directly."
-            else:
-                return f"❌ Unable to fetch broadband data: {data.get('error', 'Unknown error')}"
+        error_message = _scraped_data_error(data)
+        if error_message:
+            return error_message
         
         deals = data.get('deals', [])
         
         if not deals:
             return "❌ No deals available to find fastest option."
         
-        # Sort by speed (highest first)
-        sorted_deals = sorted(deals,
-                            key=lambda x: int(x['speed']['numeric']),
-                            reverse=True)
-        
-        fastest = sorted_deals[0]
+        # Highest speed (first one wins on ties)
+        fastest = max(deals, key=deal_speed_mb)
         
         # Create structured output
         if send_websocket_fn and create_output_fn:
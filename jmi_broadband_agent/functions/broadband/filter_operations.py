@@ -7,7 +7,7 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from loguru import logger
 
-from .helpers import normalize_contract_length
+from .helpers import normalize_contract_length, deal_speed_mb, get_scraped_data
 
 
 async def handle_filter_data(
@@ -44,10 +44,10 @@ async def handle_filter_data(
     """
     try:
         # Get current scraped data
-        if not conversation_state or user_id not in conversation_state or 'scraped_data' not in conversation_state[user_id]:
+        data = get_scraped_data(conversation_state, user_id)
+        if data is None:
             return "❌ Please scrape data first before applying filters."
         
-        data = conversation_state[user_id]['scraped_data']
         if not data or 'error' in data or data.get('total_deals', 0) == 0:
             return "❌ No data available to filter."
         
@@ -135,31 +135,34 @@ def apply_filters(deals: List[Dict], filters: Dict[str, Any]) -> List[Dict]:
     Returns:
         Filtered list of deals
     """
-    filtered_deals = deals
+    # Collect one predicate per active filter, then check each deal in a single pass
+    predicates = []
     
     # Filter by speed
     if 'speed' in filters:
         target_speed = int(filters['speed'].replace('Mb', ''))
-        filtered_deals = [deal for deal in filtered_deals if int(deal['speed']['numeric']) >= target_speed]
+        predicates.append(lambda deal: deal_speed_mb(deal) >= target_speed)
     
     # Filter by providers
     if 'providers' in filters and filters['providers']:
-        provider_list = [p.strip() for p in filters['providers'].split(',')]
-        filtered_deals = [deal for deal in filtered_deals if deal['provider']['name'] in provider_list]
+        provider_set = frozenset(p.strip() for p in filters['providers'].split(','))
+        predicates.append(lambda deal: deal['provider']['name'] in provider_set)
     
     # Filter by contract length
     if 'contract' in filters:
         target_contract = filters['contract']
-        filtered_deals = [deal for deal in filtered_deals if target_contract in deal['contract']['length_months']]
+        predicates.append(lambda deal: target_contract in deal['contract']['length_months'])
     
     # Filter by phone calls
     if 'phone_calls' in filters and filters['phone_calls'] != 'Show me everything':
-        target_calls = filters['phone_calls']
-        filtered_deals = [deal for deal in filtered_deals if target_calls.lower() in deal['features']['phone_calls'].lower()]
+        target_calls_lower = filters['phone_calls'].lower()
+        predicates.append(lambda deal: target_calls_lower in deal['features']['phone_calls'].lower())
     
     # Note: new_line filter is a URL-level parameter, not applicable to individual deals
     
-    return filtered_deals
+    if not predicates:
+        return deals
+    return [deal for deal in deals if all(predicate(deal) for predicate in predicates)]
 
 
 async def handle_refine_search(
@@ -6,7 +6,8 @@ Contains data formatting, normalization, and interpretation functions.
 import re
 import json
 from datetime import datetime
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Optional
 from loguru import logger
 
 from jmi_broadband_agent.broadband_url_generator import BroadbandConstants
@@ -335,3 +336,49 @@ def extract_numeric_speed(speed_str: str) -> int:
     except (ValueError, AttributeError):
         return 0
 
+
+@lru_cache(maxsize=1024)
+def parse_monthly_cost(monthly_cost: str) -> float:
+    """
+    Parse a scraped monthly cost string to float.
+    
+    Deals share a small set of price strings, so results are cached per string.
+    Unlike parse_currency, malformed values raise ValueError.
+    
+    Args:
+        monthly_cost: Monthly cost string (e.g., "£25.00", "£1,234.50")
+        
+    Returns:
+        Float value
+    """
+    return float(monthly_cost.replace('£', '').replace(',', ''))
+
+
+def deal_monthly_cost(deal: Dict[str, Any]) -> float:
+    """Monthly cost of a scraped deal as a number."""
+    return parse_monthly_cost(deal['pricing']['monthly_cost'])
+
+
+def deal_speed_mb(deal: Dict[str, Any]) -> int:
+    """Numeric speed of a scraped deal in Mb."""
+    return int(deal['speed']['numeric'])
+
+
+# Shared read-only default for users without conversation state
+_EMPTY_STATE: Dict[str, Any] = {}
+
+
+def get_scraped_data(conversation_state: Optional[Dict], user_id: str) -> Optional[Dict]:
+    """
+    Get a user's scraped data from the conversation state in one lookup.
+    
+    Args:
+        conversation_state: Conversation state dictionary (may be None)
+        user_id: User ID
+        
+    Returns:
+        Scraped data dictionary, or None if nothing has been scraped for the user
+    """
+    if not conversation_state:
+        return None
+    return conversation_state.get(user_id, _EMPTY_STATE).get('scraped_data')
@@ -6,6 +6,8 @@ Generates scored recommendations based on user preferences and deal characterist
 from typing import Dict, List, Any, Optional
 from loguru import logger
 
+from .helpers import deal_monthly_cost, deal_speed_mb
+
 
 class RecommendationEngine:
     """
@@ -190,7 +192,7 @@ class RecommendationEngine:
             reasons = []
             
             # Speed scoring
-            deal_speed = int(deal['speed']['numeric'])
+            deal_speed = deal_speed_mb(deal)
             preferred_speed = preferences.get('speed') or '30Mb'
             if preferred_speed and 'Mb' in preferred_speed:
                 target_speed = int(preferred_speed.replace('Mb', ''))
@@ -220,7 +222,7 @@ class RecommendationEngine:
                     reasons.append("Preferred provider")
             
             # Price scoring (lower is better)
-            monthly_cost = float(deal['pricing']['monthly_cost'].replace('£', '').replace(',', ''))
+            monthly_cost = deal_monthly_cost(deal)
             if monthly_cost <= 25:
                 score += 3
                 reasons.append("Great value")
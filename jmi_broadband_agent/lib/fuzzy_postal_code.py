@@ -20,6 +20,7 @@ from typing import List, Tuple, Optional, Dict, Set
 from collections import defaultdict
 from functools import lru_cache
 from rapidfuzz import fuzz
+from rapidfuzz.distance import Levenshtein
 import pickle
 import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -34,24 +35,8 @@ class BKTree:
     
     @staticmethod
     def levenshtein_distance(s1: str, s2: str) -> int:
-        """Calculate Levenshtein distance between two strings."""
-        if len(s1) < len(s2):
-            s1, s2 = s2, s1
-        
-        if len(s2) == 0:
-            return len(s1)
-        
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-        
-        return previous_row[-1]
+        """Calculate Levenshtein distance between two strings (RapidFuzz C++ kernel)."""
+        return Levenshtein.distance(s1, s2)
     
     def add(self, word: str):
         """Add a word to the BK-Tree."""
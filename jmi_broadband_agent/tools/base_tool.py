@@ -7,12 +7,13 @@ Enhanced with better error handling and configuration support.
 import json
 import re
 from typing import Dict, Any, Optional
-from datetime import datetime
 from pipecat.processors.frameworks.rtvi import RTVIProcessor, RTVIServerMessageFrame
 from pipecat.frames.frames import Frame, LLMMessagesAppendFrame
 from pipecat.adapters.schemas.function_schema import FunctionSchema
 from loguru import logger
 
+from jmi_broadband_agent.utils.time_utils import fast_iso_now
+
 
 class BaseTool:
     """Base tool class with standard WebSocket communication and enhanced functionality."""
@@ -56,7 +57,7 @@ class BaseTool:
     
     def _get_timestamp(self) -> str:
         """Get current timestamp in ISO format."""
-        return datetime.now().isoformat()
+        return fast_iso_now()
     
     def _initialize_user_session(self, user_id: str) -> Dict[str, Any]:
         """Initialize user session if not exists."""
@@ -219,9 +220,8 @@ class BaseTool:
             
             for user_id in tool_users:
                 try:
-                    websocket_data = registry.user_tool_websockets.get(user_id)
-                    if websocket_data and websocket_data.get("websocket"):
-                        websocket = websocket_data["websocket"]
+                    websocket = registry.get_tool_websocket(user_id)
+                    if websocket:
                         await websocket.send_json(command_data)
                         sent_count += 1
                         logger.info(f"✅ {message_type} message sent to user {user_id}")
@@ -52,6 +52,7 @@ from jmi_broadband_agent.functions.broadband import (
     handle_get_fastest,
     handle_filter_data,
     handle_refine_search,
+    apply_filters,
     handle_open_url,
     # Helpers
     create_structured_output,
@@ -445,33 +446,7 @@ class BroadbandTool(BaseTool):
 
     def _apply_filters(self, deals: List[Dict], filters: Dict[str, Any]) -> List[Dict]:
         """Apply filters to the deals list."""
-        filtered_deals = deals
-
-        # Filter by speed
-        if 'speed' in filters:
-            target_speed = int(filters['speed'].replace('Mb', ''))
-            filtered_deals = [deal for deal in filtered_deals if int(deal['speed']['numeric']) >= target_speed]
-
-        # Filter by providers
-        if 'providers' in filters and filters['providers']:
-            provider_list = [p.strip() for p in filters['providers'].split(',')]
-            filtered_deals = [deal for deal in filtered_deals if deal['provider']['name'] in provider_list]
-
-        # Filter by contract length
-        if 'contract' in filters:
-            target_contract = filters['contract']
-            filtered_deals = [deal for deal in filtered_deals if target_contract in deal['contract']['length_months']]
-
-        # Filter by phone calls
-        if 'phone_calls' in filters and filters['phone_calls'] != 'Show me everything':
-            target_calls = filters['phone_calls']
-            filtered_deals = [deal for deal in filtered_deals if target_calls.lower() in deal['features']['phone_calls'].lower()]
-
-        # Filter by new line option
-        if 'new_line' in filters and filters['new_line']:
-            pass  # This is a URL-level parameter, filtering would need different URLs
-
-        return filtered_deals
+        return apply_filters(deals, filters)
 
     async def _handle_clarify(self, user_id: str, message: str = None, context: str = None) -> str:
         """Wrapper for handle_clarify_missing_params."""
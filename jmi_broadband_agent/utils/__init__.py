@@ -8,12 +8,14 @@ __version__ = "1.0.0"
 __author__ = "Agent Team"
 
 from .validators import (
+    normalize_page_name,
     validate_page_name,
     validate_api_key,
     validate_action_type
 )
 
 __all__ = [
+    "normalize_page_name",
     "validate_page_name",
     "validate_api_key",
     "validate_action_type"
@@ -8,6 +8,7 @@ LangChain text agents and Pipecat voice agents.
 import os
 import time
 import asyncio
+import threading
 from typing import Dict, Any, Optional, Union, List
 from contextlib import contextmanager
 from datetime import datetime
@@ -27,6 +28,7 @@ try:
     from opentelemetry import trace
     from opentelemetry.sdk.trace import TracerProvider
     from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.exporter.otlp.proto.http import Compression
     from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
     from opentelemetry.sdk.resources import Resource
     OPENTELEMETRY_AVAILABLE = True
@@ -72,7 +74,8 @@ def setup_tracing(service_name: str, exporter=None, settings=None):
             try:
                 exporter = OTLPSpanExporter(
                     endpoint=settings.otel_exporter_otlp_endpoint,
-                    headers={"Authorization": settings.otel_exporter_otlp_headers}
+                    headers={"Authorization": settings.otel_exporter_otlp_headers},
+                    compression=Compression.Gzip
                 )
                 logger.info(f"✅ OTLP exporter created for {settings.otel_exporter_otlp_endpoint}")
             except Exception as e:
@@ -82,7 +85,12 @@ def setup_tracing(service_name: str, exporter=None, settings=None):
         # Add span processor with error handling
         if exporter:
             try:
-                span_processor = BatchSpanProcessor(exporter)
+                span_processor = BatchSpanProcessor(
+                    exporter,
+                    max_queue_size=settings.otel_max_queue_size,
+                    schedule_delay_millis=settings.otel_schedule_delay_millis,
+                    max_export_batch_size=settings.otel_max_export_batch_size
+                )
                 provider.add_span_processor(span_processor)
                 logger.info("✅ OTLP span processor added successfully")
             except Exception as e:
@@ -109,6 +117,37 @@ def setup_tracing(service_name: str, exporter=None, settings=None):
         return None
 
 
+# One-shot guard for process-wide tracer provider setup
+_tracing_lock = threading.Lock()
+_tracing_initialized = False
+_tracing_provider = None
+
+
+def ensure_tracing(service_name: str, settings=None):
+    """
+    Set up OpenTelemetry tracing once per process.
+
+    The tracer provider and OTLP environment variables are global, so only the
+    first call runs setup_tracing; later calls return the provider it created.
+
+    Args:
+        service_name: Name of the service for tracing
+        settings: Application settings containing Langfuse configuration
+
+    Returns:
+        The tracer provider, or None if tracing could not be set up
+    """
+    global _tracing_initialized, _tracing_provider
+    if _tracing_initialized:
+        return _tracing_provider
+
+    with _tracing_lock:
+        if not _tracing_initialized:
+            _tracing_provider = setup_tracing(service_name=service_name, settings=settings)
+            _tracing_initialized = True
+    return _tracing_provider
+
+
 class LangfuseTracer:
     """Centralized Langfuse tracing utility."""
 
@@ -157,7 +196,7 @@ class LangfuseTracer:
         """Initialize OpenTelemetry for Pipecat tracing following official docs."""
         try:
             # Use the centralized setup function
-            self._otel_provider = setup_tracing(
+            self._otel_provider = ensure_tracing(
                 service_name=self.settings.otel_service_name,
                 settings=self.settings
             )
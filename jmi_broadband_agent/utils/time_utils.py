@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Timestamp utilities for agent voice backend.
+Provides cheap ISO-8601 timestamps for high-frequency trace and log payloads.
+"""
+
+import time
+
+# Formatted "YYYY-MM-DDTHH:MM:SS" prefix for the most recent whole second
+_cached_second = -1
+_cached_prefix = ""
+
+
+def fast_iso_now() -> str:
+    """
+    Get the current local time as an ISO-8601 string.
+
+    Matches datetime.now().isoformat() (naive local time, microsecond precision)
+    but only formats the date/time part once per second instead of building a
+    datetime object on every call.
+
+    Returns:
+        ISO-8601 timestamp string
+    """
+    global _cached_second, _cached_prefix
+    now = time.time()
+    second = int(now)
+    if second != _cached_second:
+        _cached_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(second))
+        _cached_second = second
+    return f"{_cached_prefix}.{int((now - second) * 1_000_000):06d}"
@@ -9,6 +9,23 @@ from typing import List, Optional
 from jmi_broadband_agent.config.settings import get_settings
 
 
+# Single-pass translation table for page-name separators
+_PAGE_NAME_TRANS = str.maketrans(" _", "--")
+
+
+def normalize_page_name(page_name: str) -> str:
+    """
+    Normalize a page name to lowercase-hyphenated form.
+    
+    Args:
+        page_name: Raw page name
+        
+    Returns:
+        Page name stripped, lowercased, with spaces and underscores as hyphens
+    """
+    return page_name.strip().translate(_PAGE_NAME_TRANS).lower()
+
+
 def validate_page_name(page_name: str) -> tuple[bool, str]:
     """
     Validate and normalize page name - now accepts any valid string.
@@ -23,7 +40,7 @@ def validate_page_name(page_name: str) -> tuple[bool, str]:
         return False, "Page name must be a non-empty string"
     
     # Normalize page name
-    normalized = page_name.lower().strip().replace(" ", "-").replace("_", "-")
+    normalized = normalize_page_name(page_name)
     
     # Accept any valid page name - no longer strict validation
     return True, normalized
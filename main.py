@@ -97,6 +97,9 @@ def main():
             port=8200,
             ssl_keyfile=key_path,
             ssl_certfile=cert_path,
+            loop="auto",  # uvloop when installed (not on Windows), else asyncio
+            http="httptools",
+            ws="websockets",
             log_level="info"
         )
         